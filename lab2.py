@@ -1,8 +1,20 @@
+import asyncio
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+from typing import Callable, Hashable, Iterable
 
 
 # 1. Define the abstract class (SocialNetwork)
 class SocialNetwork(ABC):
+    # How many messages one API call may carry, and the per-account call
+    # budget (calls per second, with bursts up to rate_burst calls).
+    max_batch_size = 1
+    rate_limit = 10.0
+    rate_burst = 10
+
     def __init__(self, username: str, password: str) -> None:
         self.username = username
         self.password = password
@@ -12,44 +24,315 @@ class SocialNetwork(ABC):
         """Abstract method to publish a message to a social network."""
         pass
 
+    def login(self) -> None:
+        """Authenticate with the network; called once per cached session."""
+        pass
+
+    def publish_batch(self, messages: list[str]) -> None:
+        """Publish several messages in one call; networks with a bulk endpoint override this."""
+        for message in messages:
+            self.publish_message(message)
+
+    async def apublish_message(self, message: str) -> None:
+        """Publish a message without blocking the event loop."""
+        await asyncio.to_thread(self.publish_message, message)
+
+    async def apublish_batch(self, messages: list[str]) -> None:
+        """Publish a batch without blocking the event loop."""
+        await asyncio.to_thread(self.publish_batch, messages)
+
 
 # 2. Define concrete classes for Facebook and LinkedIn
 class Facebook(SocialNetwork):
+    # The Graph API accepts up to 50 requests in one batch call
+    max_batch_size = 50
+
     def __init__(self, login: str, password: str) -> None:
         super().__init__(login, password)
 
+    def login(self) -> None:
+        """Simulate logging in to Facebook."""
+        print(f"Logging in to Facebook as {self.username}")
+
     def publish_message(self, message: str) -> None:
         """Simulate publishing a message to Facebook."""
         print(f"Publishing message to Facebook: {message}")
 
+    def publish_batch(self, messages: list[str]) -> None:
+        """Simulate publishing several messages through one Facebook batch request."""
+        print(f"Publishing batch of {len(messages)} messages to Facebook: {messages}")
+
 
 class LinkedIn(SocialNetwork):
     def __init__(self, email: str, password: str) -> None:
         # LinkedIn uses email instead of username
         super().__init__(email, password)
 
+    def login(self) -> None:
+        """Simulate logging in to LinkedIn."""
+        print(f"Logging in to LinkedIn as {self.username}")
+
     def publish_message(self, message: str) -> None:
         """Simulate publishing a message to LinkedIn."""
         print(f"Publishing message to LinkedIn: {message}")
 
 
+# 2.1 Asynchronous publishing with batching and per-account rate limits
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until one token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class PublishPipeline:
+    """Queue messages per network and drain each queue with its own workers.
+
+    Messages waiting in a queue are coalesced into batches of up to the
+    network's max_batch_size, and every API call takes a token from the
+    account's bucket, so a slow or throttled network never holds up others.
+    """
+
+    def __init__(self, max_queue_size: int = 1000, workers_per_network: int = 1) -> None:
+        self.max_queue_size = max_queue_size
+        self.workers_per_network = workers_per_network
+        self._queues: dict[SocialNetwork, asyncio.Queue] = {}
+        self._buckets: dict[tuple[str, str], TokenBucket] = {}
+        self._workers: list[asyncio.Task] = []
+        self._counters: dict[SocialNetwork, dict[str, int]] = defaultdict(
+            lambda: {"published": 0, "failed": 0, "calls": 0}
+        )
+        self._started = None
+
+    def _bucket(self, network: SocialNetwork) -> TokenBucket:
+        key = (type(network).__name__, network.username)
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(network.rate_limit, network.rate_burst)
+        return self._buckets[key]
+
+    def _queue(self, network: SocialNetwork) -> asyncio.Queue:
+        if network not in self._queues:
+            self._queues[network] = asyncio.Queue(self.max_queue_size)
+            for _ in range(self.workers_per_network):
+                self._workers.append(asyncio.create_task(self._drain(network)))
+        return self._queues[network]
+
+    async def _drain(self, network: SocialNetwork) -> None:
+        queue = self._queues[network]
+        bucket = self._bucket(network)
+        counters = self._counters[network]
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < network.max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await bucket.acquire()
+                if len(batch) == 1:
+                    await network.apublish_message(batch[0])
+                else:
+                    await network.apublish_batch(batch)
+                counters["published"] += len(batch)
+            except Exception as exc:
+                counters["failed"] += len(batch)
+                print(f"Failed to publish {len(batch)} messages to {type(network).__name__}: {exc}")
+            finally:
+                counters["calls"] += 1
+                for _ in batch:
+                    queue.task_done()
+
+    async def apublish_message(self, network: SocialNetwork, message: str) -> None:
+        """Enqueue a message, waiting while that network's queue is full."""
+        if self._started is None:
+            self._started = time.monotonic()
+        await self._queue(network).put(message)
+
+    async def publish_many(self, items: Iterable[tuple[SocialNetwork, str]]) -> dict[str, dict]:
+        """Publish (network, message) pairs and wait until every queue is drained."""
+        per_network = defaultdict(list)
+        for network, message in items:
+            per_network[network].append(message)
+
+        async def feed(network: SocialNetwork, messages: list[str]) -> None:
+            for message in messages:
+                await self.apublish_message(network, message)
+
+        await asyncio.gather(*(feed(network, messages) for network, messages in per_network.items()))
+        await asyncio.gather(*(queue.join() for queue in self._queues.values()))
+        return self.stats()
+
+    def stats(self) -> dict[str, dict]:
+        """Per-network counters, current queue depth and throughput in messages per second."""
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        return {
+            f"{type(network).__name__}:{network.username}": {
+                **counters,
+                "queue_depth": self._queues[network].qsize(),
+                "throughput": counters["published"] / elapsed if elapsed else 0.0,
+            }
+            for network, counters in self._counters.items()
+        }
+
+    async def close(self) -> None:
+        """Stop the workers; messages still queued are discarded."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+
+async def publish_many(items: Iterable[tuple[SocialNetwork, str]], **pipeline_options) -> dict[str, dict]:
+    """Publish (network, message) pairs through a short-lived PublishPipeline."""
+    pipeline = PublishPipeline(**pipeline_options)
+    try:
+        return await pipeline.publish_many(items)
+    finally:
+        await pipeline.close()
+
+
 # 3. Define a factory interface to create social network connections
+class SessionCache:
+    """Thread-safe TTL + LRU cache of authenticated clients.
+
+    Creation is single-flight: when several threads miss on the same key,
+    one of them logs in and the others wait for its result.
+    """
+
+    def __init__(self, max_size: int = 128, ttl: float = 900.0) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[SocialNetwork, float]] = OrderedDict()
+        self._in_flight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, key: Hashable, create: Callable[[], SocialNetwork]) -> SocialNetwork:
+        """Return the cached client for key, calling create() at most once per miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+                self.evictions += 1
+            future = self._in_flight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            client = create()
+        except BaseException as exc:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._insert(key, client)
+        future.set_result(client)
+        return client
+
+    def put(self, key: Hashable, client: SocialNetwork) -> None:
+        """Cache client for key, replacing any existing session."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._insert(key, client)
+
+    def _insert(self, key: Hashable, client: SocialNetwork) -> None:
+        self._entries[key] = (client, time.monotonic() + self.ttl)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
 class SocialNetworkFactory(ABC):
-    @abstractmethod
+    # Shared by every factory; keys include the network name
+    sessions = SessionCache()
+    network_name: str
+
     def create_social_network(self, username: str, password: str) -> SocialNetwork:
+        """Return an authenticated client, reusing a cached session when possible."""
+        key = (self.network_name, username)
+        client = self.sessions.get_or_create(key, lambda: self._login(username, password))
+        if client.password != password:
+            # Credentials differ from the cached session's: only replace it once
+            # they have logged in, so a wrong password leaves the session intact
+            client = self._login(username, password)
+            self.sessions.put(key, client)
+        return client
+
+    def _login(self, username: str, password: str) -> SocialNetwork:
+        client = self.connect(username, password)
+        client.login()
+        return client
+
+    @abstractmethod
+    def connect(self, username: str, password: str) -> SocialNetwork:
         """Factory method to create a social network instance."""
         pass
 
 
 # 4. Implement the concrete factories for Facebook and LinkedIn
 class FacebookFactory(SocialNetworkFactory):
+    network_name = "facebook"
+
     def create_social_network(self, login: str, password: str) -> Facebook:
+        """Return an authenticated Facebook instance."""
+        return super().create_social_network(login, password)
+
+    def connect(self, login: str, password: str) -> Facebook:
         """Create a Facebook instance."""
         return Facebook(login, password)
 
 
-class LinkedInFactory:
+class LinkedInFactory(SocialNetworkFactory):
+    network_name = "linkedin"
+
     def create_social_network(self, email: str, password: str) -> LinkedIn:
+        """Return an authenticated LinkedIn instance."""
+        return super().create_social_network(email, password)
+
+    def connect(self, email: str, password: str) -> LinkedIn:
         """Create a LinkedIn instance."""
         return LinkedIn(email, password)
 
@@ -64,3 +347,13 @@ if __name__ == "__main__":
     linkedin_factory = LinkedInFactory()
     linkedin = linkedin_factory.create_social_network(email="linkedin_user@example.com", password="linkedin_pass")
     linkedin.publish_message("Hello, LinkedIn!")
+
+    # Campaign fan-out through the asynchronous pipeline
+    campaign = [(facebook, f"Campaign post #{i}") for i in range(1, 8)]
+    campaign += [(linkedin, f"Campaign post #{i}") for i in range(1, 4)]
+    print(asyncio.run(publish_many(campaign)))
+
+    # Repeated factory calls reuse the cached, already authenticated session
+    facebook_again = facebook_factory.create_social_network(login="facebook_user", password="facebook_pass")
+    print(f"Same Facebook session reused: {facebook_again is facebook}")
+    print(SocialNetworkFactory.sessions.stats())
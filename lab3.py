@@ -1,4 +1,43 @@
+import copy
+import re
+import sqlite3
+import sys
+import time
+import timeit
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Callable, Generator, Iterable, Iterator, NamedTuple, Optional, Sequence, Union
+
+
+# Marks a bound parameter inside where() conditions, whatever the dialect;
+# write ESCAPED_MARKER for a literal '?' such as PostgreSQL's jsonb operators
+PARAM_MARKER = '?'
+ESCAPED_MARKER = '??'
+_MARKER_PATTERN = re.compile(r'\?\??')
+
+
+class CompiledQuery(NamedTuple):
+    """Immutable SQL template plus the parameter vector to execute it with."""
+    sql: str
+    params: tuple
+
+
+class BulkLoad(NamedTuple):
+    """Bulk-load statement plus the lazily generated data stream it consumes."""
+    query: CompiledQuery
+    data: Iterator[bytes]
+
+
+class CursorPlan(NamedTuple):
+    """Statements for scanning a result set in constant memory.
+
+    `fetch` and `close` are None when the dialect streams through the
+    driver's unbuffered cursor instead of a server-side cursor.
+    """
+    open: CompiledQuery
+    fetch: Optional[str]
+    close: Optional[str]
+    fetch_size: int
 
 
 # 1. Common interface for query building
@@ -8,77 +47,529 @@ class QueryBuilder(ABC):
         pass
 
     @abstractmethod
-    def where(self, condition: str):
+    def where(self, condition: str, *params: Any):
         pass
 
     @abstractmethod
     def limit(self, limit: int):
         pass
 
+    @abstractmethod
+    def compile(self) -> CompiledQuery:
+        pass
+
     @abstractmethod
     def getSQL(self) -> str:
         pass
 
 
-# 2. PostgreSQL-specific query builder
-class PostgresQueryBuilder(QueryBuilder):
+@lru_cache(maxsize=1024)
+def _compile_template(shape: tuple) -> str:
+    builder_class, *parts = shape
+    return builder_class.render_template(*parts)
+
+
+@lru_cache(maxsize=256)
+def _insert_template(builder_class, table: str, columns: tuple, row_count: int) -> str:
+    width = len(columns)
+    rows = ', '.join(
+        '(' + ', '.join(builder_class.placeholder(row * width + column + 1) for column in range(width)) + ')'
+        for row in range(row_count)
+    )
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES {rows}"
+
+
+def _estimated_size(value: Any) -> int:
+    """Rough size of a value once rendered as an SQL literal."""
+    if value is None:
+        return 4
+    if isinstance(value, (bytes, bytearray)):
+        return 2 * len(value) + 3
+    return len(str(value)) + 2
+
+
+def _stream_lines(lines: Iterable[Union[str, bytes]], chunk_size: int) -> Iterator[bytes]:
+    """Encode lines and yield them in chunks of roughly chunk_size bytes."""
+    buffer = []
+    buffered = 0
+    for line in lines:
+        encoded = line.encode() if isinstance(line, str) else line
+        buffer.append(encoded)
+        buffered += len(encoded)
+        if buffered >= chunk_size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _split_condition(condition: str) -> list[str]:
+    """Text around each bind marker, with escaped markers turned back into '?'."""
+    pieces = ['']
+    position = 0
+    for match in _MARKER_PATTERN.finditer(condition):
+        pieces[-1] += condition[position:match.start()]
+        if match.group() == ESCAPED_MARKER:
+            pieces[-1] += PARAM_MARKER
+        else:
+            pieces.append('')
+        position = match.end()
+    pieces[-1] += condition[position:]
+    return pieces
+
+
+def template_cache_info():
+    """Hit/miss statistics of the compiled template cache."""
+    return _compile_template.cache_info()
+
+
+# 1.1 Shared implementation: builders record the query shape and the bound
+# values separately, so equal shapes share one cached SQL template
+class SQLQueryBuilder(QueryBuilder):
     def __init__(self):
-        self._query = ''
+        self._reset()
+
+    def _reset(self):
+        self._table = ''
+        self._columns = ()
+        self._conditions = []
+        self._params = []
+        self._order_by = ()
+        self._descending = False
+        self._after_columns = ()
+        self._after_values = ()
+        self._limit = None
+
+    def _clone(self):
+        clone = copy.copy(self)
+        clone._conditions = list(self._conditions)
+        clone._params = list(self._params)
+        return clone
 
     def select(self, table: str, columns: list):
-        columns_part = ', '.join(columns)
-        self._query = f'SELECT {columns_part} FROM {table}'
+        self._reset()
+        self._table = table
+        self._columns = tuple(columns)
         return self
 
-    def where(self, condition: str):
-        self._query += f' WHERE {condition}'
+    def where(self, condition: str, *params: Any):
+        markers = len(_split_condition(condition)) - 1
+        if markers != len(params):
+            raise ValueError(
+                f"Condition '{condition}' has {markers} placeholders but "
+                f"{len(params)} parameters were given; write '??' for a literal '?'."
+            )
+        self._conditions.append(condition)
+        self._params.extend(params)
         return self
 
     def limit(self, limit: int):
-        self._query += f' LIMIT {limit}'
+        self._limit = limit
+        return self
+
+    def order_by(self, *columns: str, descending: bool = False):
+        self._order_by = columns
+        self._descending = descending
+        return self
+
+    def after(self, column, value):
+        """Keyset condition: only rows that sort after `value` in `column`.
+
+        Pass tuples of columns and values to page on a composite key.
+        """
+        if isinstance(column, (tuple, list)):
+            self._after_columns, self._after_values = tuple(column), tuple(value)
+        else:
+            self._after_columns, self._after_values = (column,), (value,)
         return self
 
+    def shape(self) -> tuple:
+        """Hashable description of everything that affects the SQL text."""
+        return (
+            type(self),
+            self._table,
+            self._columns,
+            tuple(self._conditions),
+            self._after_columns,
+            self._order_by,
+            self._descending,
+            self._limit is not None,
+        )
+
+    def params(self) -> tuple:
+        limit = () if self._limit is None else (self._limit,)
+        return (*self._params, *self._after_values, *limit)
+
+    def keyset_pages(self, page_size: int) -> Generator[CompiledQuery, Any, None]:
+        """Yield the query for each page; send() the last row's key to get the next.
+
+        Sending None (or exhausting the data) ends the generator. Unlike
+        OFFSET, each page query seeks straight to its key, so deep pages cost
+        the same as the first.
+        """
+        if not self._order_by:
+            raise ValueError('Keyset pagination needs order_by().')
+        page = self._clone().limit(page_size)
+        while True:
+            last_key = yield page.compile()
+            if last_key is None:
+                return
+            page.after(page._order_by if len(page._order_by) > 1 else page._order_by[0], last_key)
+
+    def iter_pages(
+        self, fetch: Callable[[CompiledQuery], list], page_size: int = 1000
+    ) -> Iterator[list]:
+        """Run keyset page queries through fetch() and yield each non-empty page.
+
+        The ordering columns must be among the selected columns.
+        """
+        key_positions = [self._columns.index(column) for column in self._order_by]
+        pages = self.keyset_pages(page_size)
+        query = next(pages)
+        while True:
+            rows = fetch(query)
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                pages.close()
+                return
+            last = rows[-1]
+            key = tuple(last[position] for position in key_positions)
+            query = pages.send(key if len(key) > 1 else key[0])
+
+    def server_side_cursor(self, name: str, fetch_size: int = 1000) -> CursorPlan:
+        """Scan plan for the whole result set; the default streams via an unbuffered driver cursor."""
+        return CursorPlan(self.compile(), None, None, fetch_size)
+
+    def compile(self) -> CompiledQuery:
+        return CompiledQuery(_compile_template(self.shape()), self.params())
+
     def getSQL(self) -> str:
-        return self._query
+        """SQL text with the bound values inlined as literals, for logging and old callers.
+
+        Use compile() to execute queries; this path is not cached.
+        """
+        _, *parts = self.shape()
+        return self.render_template(*parts, literals=self.params())
+
+    def insert_many(
+        self, table: str, columns: list, rows: Iterable[Sequence], max_rows: int = 1000
+    ) -> Iterator[CompiledQuery]:
+        """Yield multi-row INSERTs that stay under the dialect's parameter and packet limits.
+
+        Rows are consumed lazily, so only one statement's worth is held at a time.
+        """
+        columns = tuple(columns)
+        rows_per_statement = min(max_rows, self.max_params // len(columns))
+        batch = []
+        batch_size = 0
+        for row in rows:
+            if len(row) != len(columns):
+                raise ValueError(f'Expected {len(columns)} values per row, got {len(row)}.')
+            row_size = sum(map(_estimated_size, row)) + 2 * len(row) + 4
+            if batch and batch_size + row_size > self.max_statement_bytes:
+                yield self._insert(table, columns, batch)
+                batch = []
+                batch_size = 0
+            batch.append(row)
+            batch_size += row_size
+            if len(batch) == rows_per_statement:
+                yield self._insert(table, columns, batch)
+                batch = []
+                batch_size = 0
+        if batch:
+            yield self._insert(table, columns, batch)
+
+    def _insert(self, table: str, columns: tuple, rows: list) -> CompiledQuery:
+        sql = _insert_template(type(self), table, columns, len(rows))
+        return CompiledQuery(sql, tuple(value for row in rows for value in row))
+
+    @staticmethod
+    @abstractmethod
+    def placeholder(index: int) -> str:
+        """Dialect placeholder for the 1-based parameter index."""
+        pass
+
+    @classmethod
+    def escape_text(cls, text: str) -> str:
+        """Escape literal SQL text so the driver does not mistake it for placeholders."""
+        return text
+
+    @classmethod
+    def literal(cls, value: Any) -> str:
+        """Render a value as an SQL literal."""
+        if value is None:
+            return 'NULL'
+        if isinstance(value, bool):
+            return 'TRUE' if value else 'FALSE'
+        if isinstance(value, (int, float)):
+            return repr(value)
+        if isinstance(value, (bytes, bytearray)):
+            return f"X'{value.hex()}'"
+        return "'" + str(value).replace("'", "''") + "'"
+
+    @classmethod
+    def render_template(
+        cls, table: str, columns: tuple, conditions: tuple, after_columns: tuple,
+        order_by: tuple, descending: bool, has_limit: bool, literals: Optional[tuple] = None,
+    ) -> str:
+        """SQL template for a query shape; with literals, values are inlined instead."""
+        if literals is None:
+            placeholder, escape_text = cls.placeholder, cls.escape_text
+        else:
+            placeholder, escape_text = lambda index: cls.literal(literals[index - 1]), str
+        index = 1
+        parts = [f"SELECT {', '.join(columns)} FROM {table}"]
+        rendered = []
+        for condition in conditions:
+            pieces = [escape_text(piece) for piece in _split_condition(condition)]
+            text = pieces[0]
+            for piece in pieces[1:]:
+                text += placeholder(index) + piece
+                index += 1
+            rendered.append(text)
+        if after_columns:
+            operator = '<' if descending else '>'
+            placeholders = [placeholder(index + offset) for offset in range(len(after_columns))]
+            index += len(after_columns)
+            if len(after_columns) == 1:
+                rendered.append(f'{after_columns[0]} {operator} {placeholders[0]}')
+            else:
+                rendered.append(
+                    f"({', '.join(after_columns)}) {operator} ({', '.join(placeholders)})"
+                )
+        if rendered:
+            if len(rendered) > 1:
+                rendered = [f'({text})' for text in rendered]
+            parts.append('WHERE ' + ' AND '.join(rendered))
+        if order_by:
+            direction = ' DESC' if descending else ''
+            parts.append('ORDER BY ' + ', '.join(column + direction for column in order_by))
+        if has_limit:
+            parts.append(f'LIMIT {placeholder(index)}')
+        return ' '.join(parts)
+
+
+# 2. PostgreSQL-specific query builder
+class PostgresQueryBuilder(SQLQueryBuilder):
+    # Bind parameters are counted in an int16 in the wire protocol
+    max_params = 65535
+    max_statement_bytes = 256 * 1024 * 1024
+
+    _COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+    @staticmethod
+    def placeholder(index: int) -> str:
+        return f'${index}'
+
+    @classmethod
+    def literal(cls, value: Any) -> str:
+        if isinstance(value, (bytes, bytearray)):
+            return f"'\\x{value.hex()}'::bytea"
+        return super().literal(value)
+
+    def server_side_cursor(self, name: str, fetch_size: int = 1000) -> CursorPlan:
+        """DECLARE/FETCH/CLOSE statements; run them inside one transaction."""
+        query = self.compile()
+        return CursorPlan(
+            CompiledQuery(f'DECLARE {name} NO SCROLL CURSOR FOR {query.sql}', query.params),
+            f'FETCH FORWARD {fetch_size} FROM {name}',
+            f'CLOSE {name}',
+            fetch_size,
+        )
+
+    @classmethod
+    def copy_field(cls, value: Any) -> str:
+        """Render one value in COPY text format."""
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, (bytes, bytearray)):
+            return '\\\\x' + value.hex()
+        return str(value).translate(cls._COPY_ESCAPES)
+
+    def copy_from_stdin(
+        self, table: str, columns: list, rows: Iterable[Sequence], chunk_size: int = 64 * 1024
+    ) -> BulkLoad:
+        """COPY ... FROM STDIN statement and a lazy stream of its text-format data."""
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        lines = ('\t'.join(map(self.copy_field, row)) + '\n' for row in rows)
+        return BulkLoad(CompiledQuery(sql, ()), _stream_lines(lines, chunk_size))
 
 
 # 3. MySQL-specific query builder
-class MySQLQueryBuilder(QueryBuilder):
-    def __init__(self):
-        self._query = ''
+class MySQLQueryBuilder(SQLQueryBuilder):
+    # Prepared statements cap placeholders at 65535; the server's default
+    # max_allowed_packet is 64 MiB
+    max_params = 65535
+    max_statement_bytes = 64 * 1024 * 1024
 
-    def select(self, table: str, columns: list):
-        columns_part = ', '.join(columns)
-        self._query = f'SELECT {columns_part} FROM {table}'
-        return self
+    _INFILE_ESCAPES = {b'\\': b'\\\\', b'\t': b'\\t', b'\n': b'\\n', b'\r': b'\\r', b'\0': b'\\0'}
+    _INFILE_SPECIALS = re.compile(rb'[\\\t\n\r\0]')
 
-    def where(self, condition: str):
-        self._query += f' WHERE {condition}'
-        return self
+    @staticmethod
+    def placeholder(index: int) -> str:
+        return '%s'
 
-    def limit(self, limit: int):
-        self._query += f' LIMIT {limit}'
-        return self
+    @classmethod
+    def escape_text(cls, text: str) -> str:
+        return text.replace('%', '%%')
 
-    def getSQL(self) -> str:
-        return self._query
+    @classmethod
+    def literal(cls, value: Any) -> str:
+        # Backslash is an escape character in MySQL string literals by default
+        if isinstance(value, str):
+            value = value.replace('\\', '\\\\')
+        return super().literal(value)
+
+    @classmethod
+    def infile_field(cls, value: Any) -> bytes:
+        """Render one value for LOAD DATA with the default field and line options.
+
+        Text is written as UTF-8 and bytes pass through unchanged; the file
+        is loaded with CHARACTER SET binary so neither is converted.
+        """
+        if value is None:
+            return b'\\N'
+        if isinstance(value, bool):
+            return b'1' if value else b'0'
+        if not isinstance(value, (bytes, bytearray)):
+            value = str(value).encode()
+        return cls._INFILE_SPECIALS.sub(lambda match: cls._INFILE_ESCAPES[match.group()], value)
+
+    def load_data_local_infile(
+        self, table: str, columns: list, rows: Iterable[Sequence],
+        file_name: str, chunk_size: int = 64 * 1024,
+    ) -> BulkLoad:
+        """LOAD DATA LOCAL INFILE statement and the lazy contents to write to file_name."""
+        sql = (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET binary "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(columns)})"
+        )
+        lines = (b'\t'.join(map(self.infile_field, row)) + b'\n' for row in rows)
+        return BulkLoad(CompiledQuery(sql, (file_name,)), _stream_lines(lines, chunk_size))
+
+
+# 3.1 SQLite query builder, handy for running builder output locally
+class SQLiteQueryBuilder(SQLQueryBuilder):
+    max_params = 32766
+    max_statement_bytes = 1_000_000_000
+
+    @staticmethod
+    def placeholder(index: int) -> str:
+        return '?'
+
+
+# 4. Benchmarks
+def benchmark_compile(iterations: int = 100_000) -> None:
+    """Build-and-compile throughput with and without the template cache."""
+    def build():
+        return (
+            PostgresQueryBuilder()
+            .select('users', ['id', 'name', 'email'])
+            .where('age > ?', 18)
+            .where('country = ?', 'UA')
+            .limit(10)
+        )
+
+    def compile_uncached():
+        builder = build()
+        _, *parts = builder.shape()
+        return CompiledQuery(builder.render_template(*parts), builder.params())
+
+    cached = timeit.timeit(lambda: build().compile(), number=iterations)
+    uncached = timeit.timeit(compile_uncached, number=iterations)
+    print(f'cached templates:   {iterations / cached:12,.0f} queries/s')
+    print(f'uncached templates: {iterations / uncached:12,.0f} queries/s')
+    print(template_cache_info())
+
+
+def benchmark_pagination(rows: int = 300_000, page_size: int = 1000) -> None:
+    """Per-page cost of OFFSET paging vs keyset paging on an sqlite table."""
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, payload TEXT)')
+    builder = SQLiteQueryBuilder()
+    for insert in builder.insert_many('events', ['id', 'payload'], ((i, f'event {i}') for i in range(rows))):
+        connection.execute(*insert)
+
+    def fetch(query: CompiledQuery) -> list:
+        return connection.execute(*query).fetchall()
+
+    scan = SQLiteQueryBuilder().select('events', ['id', 'payload']).order_by('id')
+    offset_query = scan._clone().limit(page_size).compile()
+    page_count = rows // page_size
+    checkpoints = {0, page_count // 2, page_count - 1}
+
+    print(f"{'page':>6} {'OFFSET ms':>10} {'keyset ms':>10}")
+    offset_times = {}
+    for page in checkpoints:
+        start = time.perf_counter()
+        connection.execute(offset_query.sql + ' OFFSET ?', (*offset_query.params, page * page_size)).fetchall()
+        offset_times[page] = (time.perf_counter() - start) * 1000
+
+    keyset_times = []
+    pages = scan.iter_pages(fetch, page_size)
+    start = time.perf_counter()
+    for page, _ in enumerate(pages):
+        keyset_times.append((time.perf_counter() - start) * 1000)
+        if page in checkpoints:
+            print(f'{page:>6} {offset_times[page]:>10.2f} {keyset_times[page]:>10.2f}')
+        start = time.perf_counter()
+
+    # Keyset cost must stay flat: the deepest pages may not cost much more than the first
+    window = min(10, len(keyset_times))
+    first, last = sorted(keyset_times[:window]), sorted(keyset_times[-window:])
+    first_median, last_median = first[window // 2], last[window // 2]
+    assert last_median <= 3 * first_median, (
+        f'keyset paging slowed from {first_median:.2f} ms to {last_median:.2f} ms per page'
+    )
 
 
 if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        benchmark_compile()
+        benchmark_pagination()
+        sys.exit()
+
     postgres_builder = PostgresQueryBuilder()
     postgres_query = (
         postgres_builder.select('users', ['id', 'name', 'email'])
-        .where('age > 18')
+        .where('age > ?', 18)
         .limit(10)
-        .getSQL()
+        .compile()
     )
     print('PostgreSQL Query:', postgres_query)
+    jsonb_query = PostgresQueryBuilder().select('docs', ['id']).where('tags ??| ?', '{a,b}').limit(10)
+    print('PostgreSQL SQL text:', jsonb_query.getSQL())
 
     mysql_builder = MySQLQueryBuilder()
     mysql_query = (
         mysql_builder.select('users', ['id', 'name', 'email'])
-        .where('age > 18')
+        .where('age > ?', 18)
         .limit(10)
-        .getSQL()
+        .compile()
     )
     print('MySQL Query:', mysql_query)
+
+    rows = ((i, f'user{i}', None if i % 2 else f'user{i}@example.com') for i in range(2500))
+    inserts = list(postgres_builder.insert_many('users', ['id', 'name', 'email'], rows))
+    print(f'Bulk INSERT: {len(inserts)} statements, first has {len(inserts[0].params)} parameters')
+
+    copy_load = postgres_builder.copy_from_stdin(
+        'users', ['id', 'name', 'bio'], [(1, 'Ann', 'line one\nline\ttwo'), (2, 'Bob', None)]
+    )
+    print('PostgreSQL COPY:', copy_load.query.sql, b''.join(copy_load.data))
+
+    load = mysql_builder.load_data_local_infile(
+        'users', ['id', 'name'], [(1, 'Ann'), (2, None)], '/tmp/users.tsv'
+    )
+    print('MySQL LOAD DATA:', load.query, b''.join(load.data))
+
+    pages = postgres_builder.select('users', ['id', 'name']).order_by('id').keyset_pages(100)
+    print('Keyset page 1:', next(pages))
+    print('Keyset page 2:', pages.send(100))
+    cursor = PostgresQueryBuilder().select('events', ['id', 'payload']).where('kind = ?', 'click')
+    print('PostgreSQL cursor:', cursor.server_side_cursor('events_scan', 5000))
@@ -1,4 +1,17 @@
+import bisect
+import http.client
+import json
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
 from abc import ABC, abstractmethod
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import urlsplit
 
 
 # 1. Define the Notification interface
@@ -7,12 +20,21 @@ class Notification(ABC):
     def send(self, title: str, message: str) -> None:
         pass
 
+    @property
+    def recipient(self) -> str:
+        """Who receives the messages; adapters override this with their address."""
+        return f'{type(self).__name__}@{id(self):x}'
+
 
 # 2. Implement EmailNotification class
 class EmailNotification(Notification):
     def __init__(self, admin_email: str):
         self.admin_email = admin_email
 
+    @property
+    def recipient(self) -> str:
+        return self.admin_email
+
     def send(self, title: str, message: str) -> None:
         print(
             f"Sent email with title '{title}' to '{self.admin_email}' that says '{message}'."
@@ -20,19 +42,162 @@ class EmailNotification(Notification):
 
 
 # 3. Create SlackNotification adapter
+class SlackAPIError(Exception):
+    """Non-2xx answer from the Slack API."""
+
+    def __init__(self, status: int, body: bytes):
+        super().__init__(f'Slack API answered HTTP {status}: {body[:200]!r}')
+        self.status = status
+
+
+class SlackSession:
+    """Cached authorization and pooled HTTP connections for one set of Slack credentials.
+
+    Every SlackNotification with the same credentials shares one session.
+    The token is refreshed once it is within `refresh_margin` seconds of
+    expiry. While a refresh is running, other senders keep using the old
+    token, which is still valid. Without a base_url the HTTP calls are
+    simulated.
+    """
+
+    _sessions: dict[tuple, 'SlackSession'] = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(
+        self, login: str, api_key: str, base_url: Optional[str] = None,
+        pool_size: int = 4, refresh_margin: float = 60.0, default_ttl: float = 3600.0,
+    ):
+        self.login = login
+        self.api_key = api_key
+        self.base_url = base_url
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.round_trips = 0
+        self._token = None
+        self._expires_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._connections = queue.LifoQueue(pool_size)
+
+    @classmethod
+    def shared(cls, login: str, api_key: str, base_url: Optional[str] = None) -> 'SlackSession':
+        key = (login, api_key, base_url)
+        with cls._sessions_lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = cls._sessions[key] = cls(login, api_key, base_url)
+            return session
+
+    def token(self) -> str:
+        now = time.monotonic()
+        if self._token is not None and now < self._expires_at - self.refresh_margin:
+            return self._token
+        still_valid = self._token is not None and now < self._expires_at
+        if not self._refresh_lock.acquire(blocking=not still_valid):
+            return self._token
+        try:
+            if self._token is None or time.monotonic() >= self._expires_at - self.refresh_margin:
+                self._authorize()
+            return self._token
+        finally:
+            self._refresh_lock.release()
+
+    def invalidate(self) -> None:
+        """Drop the cached token, e.g. after the API rejected it."""
+        self._expires_at = 0.0
+
+    def _authorize(self) -> None:
+        if self.base_url is None:
+            print(f'Authorizing Slack user {self.login} with API key {self.api_key}')
+            token, expires_in = uuid.uuid4().hex, self.default_ttl
+        else:
+            response = self.request(
+                '/api/auth', {'login': self.login, 'api_key': self.api_key}, idempotent=True
+            )
+            token, expires_in = response['token'], response.get('expires_in', self.default_ttl)
+        self._token = token
+        self._expires_at = time.monotonic() + expires_in
+
+    def _connection(self) -> http.client.HTTPConnection:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            url = urlsplit(self.base_url)
+            connection_class = (
+                http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+            )
+            return connection_class(url.netloc, timeout=10)
+
+    def request(
+        self, path: str, payload: dict, token: Optional[str] = None, idempotent: bool = False
+    ) -> dict:
+        """POST JSON over a pooled keep-alive connection.
+
+        A request that fails while being sent is retried once on a fresh
+        connection. A failure while awaiting the response is retried only
+        for idempotent calls, since the server may already have acted on it.
+        Non-2xx answers raise SlackAPIError; a 401 also drops the token.
+        """
+        body = json.dumps(payload).encode()
+        headers = {'Content-Type': 'application/json'}
+        if token is not None:
+            headers['Authorization'] = f'Bearer {token}'
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request('POST', path, body, headers)
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                if attempt:
+                    raise
+                continue
+            try:
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                if attempt or not idempotent:
+                    raise
+                continue
+            self.round_trips += 1
+            if response.will_close:
+                connection.close()
+            else:
+                try:
+                    self._connections.put_nowait(connection)
+                except queue.Full:
+                    connection.close()
+            if not 200 <= response.status < 300:
+                if response.status == 401:
+                    self.invalidate()
+                raise SlackAPIError(response.status, data)
+            return json.loads(data)
+
+
 class SlackNotification(Notification):
-    def __init__(self, login: str, api_key: str, chat_id: str):
+    def __init__(self, login: str, api_key: str, chat_id: str, base_url: Optional[str] = None):
         self.login = login
         self.api_key = api_key
         self.chat_id = chat_id
+        self._session = SlackSession.shared(login, api_key, base_url)
 
-    def _authorize(self):
-        print(f'Authorizing Slack user {self.login} with API key {self.api_key}')
+    @property
+    def recipient(self) -> str:
+        return self.chat_id
+
+    def _authorize(self) -> str:
+        return self._session.token()
 
     def send(self, title: str, message: str) -> None:
-        self._authorize()
-        print(
-            f"Sent Slack message with title '{title}' to chat '{self.chat_id}' that says '{message}'."
+        token = self._authorize()
+        if self._session.base_url is None:
+            print(
+                f"Sent Slack message with title '{title}' to chat '{self.chat_id}' that says '{message}'."
+            )
+            return
+        self._session.request(
+            '/api/chat.postMessage',
+            {'channel': self.chat_id, 'text': f'*{title}*\n{message}'},
+            token,
         )
 
 
@@ -42,18 +207,443 @@ class SMSNotification(Notification):
         self.phone = phone
         self.sender = sender
 
+    @property
+    def recipient(self) -> str:
+        return self.phone
+
     def send(self, title: str, message: str) -> None:
         print(
             f"Sent SMS from '{self.sender}' to '{self.phone}' with title '{title}' that says '{message}'."
         )
 
 
+# 5. Non-blocking dispatcher with per-channel worker pools
+class LatencyHistogram:
+    BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self._counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self._total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        milliseconds = seconds * 1000
+        with self._lock:
+            self._counts[bisect.bisect_left(self.BOUNDS_MS, milliseconds)] += 1
+            self._total_ms += milliseconds
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (ms) of the bucket holding the given fraction of samples."""
+        with self._lock:
+            target = fraction * sum(self._counts)
+            seen = 0
+            for bound, count in zip(self.BOUNDS_MS + (float('inf'),), self._counts):
+                seen += count
+                if count and seen >= target:
+                    return bound
+        return 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count = sum(self._counts)
+            buckets = {
+                f'<={bound}ms': bucket for bound, bucket in zip(self.BOUNDS_MS, self._counts)
+            }
+            buckets[f'>{self.BOUNDS_MS[-1]}ms'] = self._counts[-1]
+            mean = self._total_ms / count if count else 0.0
+        return {
+            'count': count,
+            'mean_ms': mean,
+            'p50_ms': self.percentile(0.5),
+            'p99_ms': self.percentile(0.99),
+            'buckets': buckets,
+        }
+
+
+class _Channel:
+    def __init__(self, queue_size: int):
+        self.queue = queue.Queue(queue_size)
+        self.workers = []
+        self.latency = LatencyHistogram()
+        self.counters = {'sent': 0, 'failed': 0, 'dropped': 0, 'retries': 0}
+        self.lock = threading.Lock()
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] += 1
+
+
+class NotificationDispatcher:
+    """Accepts sends for any Notification and delivers them on background workers.
+
+    Each channel (Notification subclass) gets its own bounded queue and worker
+    threads, so a slow channel only backs up itself. A full queue applies
+    backpressure: submit() waits up to `timeout` (0.1s by default) and then
+    drops the message, so callers on a request path never hang on a stuck channel.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        queue_size: int = 10_000,
+        workers_per_channel: int = 4,
+        max_retries: int = 3,
+        base_delay: float = 0.05,
+        max_delay: float = 2.0,
+    ):
+        self.queue_size = queue_size
+        self.workers_per_channel = workers_per_channel
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._channels: dict[str, _Channel] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _channel(self, name: str) -> _Channel:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Dispatcher is closed.')
+            channel = self._channels.get(name)
+            if channel is None:
+                channel = self._channels[name] = _Channel(self.queue_size)
+                for index in range(self.workers_per_channel):
+                    worker = threading.Thread(
+                        target=self._work, args=(channel,), name=f'{name}-{index}', daemon=True
+                    )
+                    worker.start()
+                    channel.workers.append(worker)
+            return channel
+
+    def submit(
+        self, notification: Notification, title: str, message: str,
+        block: bool = True, timeout: Optional[float] = 0.1,
+    ) -> bool:
+        """Queue a send; returns False if it was dropped because the queue stayed full."""
+        channel = self._channel(type(notification).__name__)
+        try:
+            channel.queue.put((notification, title, message, time.monotonic()), block, timeout)
+        except queue.Full:
+            channel.count('dropped')
+            return False
+        return True
+
+    def _work(self, channel: _Channel) -> None:
+        while True:
+            item = channel.queue.get()
+            if item is self._STOP:
+                return
+            notification, title, message, queued_at = item
+            for attempt in range(self.max_retries + 1):
+                try:
+                    notification.send(title, message)
+                except Exception:
+                    if attempt == self.max_retries:
+                        channel.count('failed')
+                        break
+                    channel.count('retries')
+                    delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+                else:
+                    channel.count('sent')
+                    break
+            channel.latency.record(time.monotonic() - queued_at)
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            channels = dict(self._channels)
+        return {
+            name: {
+                **channel.counters,
+                'queue_depth': channel.queue.qsize(),
+                'latency': channel.latency.snapshot(),
+            }
+            for name, channel in channels.items()
+        }
+
+    def close(self) -> None:
+        """Deliver everything already queued, then stop the workers."""
+        with self._lock:
+            self._closed = True
+            channels = list(self._channels.values())
+        for channel in channels:
+            for _ in channel.workers:
+                channel.queue.put(self._STOP)
+        for channel in channels:
+            for worker in channel.workers:
+                worker.join()
+
+
+# 6. Coalescing near-identical sends into digests
+class _Digest:
+    def __init__(self, notification: Notification, title: str, opened_at: float):
+        self.notification = notification
+        self.title = title
+        self.opened_at = opened_at
+        self.messages = Counter()
+        self.count = 0
+
+
+class NotificationCoalescer:
+    """Groups sends by (channel, recipient, title) and emits one digest per group.
+
+    A group is flushed when its window expires or when it reaches max_batch
+    sends; a group holding a single send is delivered unchanged. Digests go
+    through `deliver`, which defaults to calling send() directly and can be
+    pointed at NotificationDispatcher.submit.
+    """
+
+    def __init__(
+        self,
+        window: float = 30.0,
+        max_batch: int = 100,
+        max_listed: int = 5,
+        deliver: Optional[Callable[[Notification, str, str], object]] = None,
+    ):
+        self.window = window
+        self.max_batch = max_batch
+        self.max_listed = max_listed
+        self.deliver = deliver or (lambda notification, title, message: notification.send(title, message))
+        self.received = 0
+        self.delivered = 0
+        self._groups: dict[tuple, _Digest] = {}
+        self._condition = threading.Condition()
+        self._flusher = None
+        self._closed = False
+
+    def send(self, notification: Notification, title: str, message: str) -> None:
+        key = (type(notification).__name__, notification.recipient, title)
+        full = None
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Coalescer is closed.')
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = _Digest(notification, title, time.monotonic())
+                self._condition.notify()
+            group.messages[message] += 1
+            group.count += 1
+            self.received += 1
+            if group.count >= self.max_batch:
+                full = self._groups.pop(key)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_expired, daemon=True)
+                self._flusher.start()
+        if full is not None:
+            self._emit(full)
+
+    def _flush_expired(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                expired = [key for key, group in self._groups.items() if now - group.opened_at >= self.window]
+                due = [self._groups.pop(key) for key in expired]
+                if not due:
+                    deadlines = [group.opened_at + self.window for group in self._groups.values()]
+                    self._condition.wait(min(deadlines) - now if deadlines else None)
+                    continue
+            for group in due:
+                try:
+                    self._emit(group)
+                except Exception as exc:
+                    print(f'Failed to deliver digest {group.title!r}: {exc}')
+
+    def _emit(self, group: _Digest) -> None:
+        if group.count == 1:
+            self.deliver(group.notification, group.title, next(iter(group.messages)))
+        else:
+            lines = [
+                f'- {message}' + (f' (x{count})' if count > 1 else '')
+                for message, count in group.messages.most_common(self.max_listed)
+            ]
+            hidden = len(group.messages) - self.max_listed
+            if hidden > 0:
+                lines.append(f'- ... and {hidden} other distinct messages')
+            digest = f'{group.count} notifications:\n' + '\n'.join(lines)
+            self.deliver(group.notification, f'[x{group.count}] {group.title}', digest)
+        with self._condition:
+            self.delivered += 1
+
+    def flush(self) -> None:
+        """Emit every open group now."""
+        with self._condition:
+            groups = list(self._groups.values())
+            self._groups.clear()
+        for group in groups:
+            self._emit(group)
+
+    def close(self) -> None:
+        """Stop accepting sends and deliver everything already received."""
+        with self._condition:
+            self._closed = True
+            groups = list(self._groups.values())
+            self._groups.clear()
+            self._condition.notify()
+            flusher = self._flusher
+        for group in groups:
+            self._emit(group)
+        # The flusher may still be emitting groups it took before the close
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join()
+
+
+class CoalescingNotification(Notification):
+    """Adapter that routes any Notification through a shared NotificationCoalescer."""
+
+    def __init__(self, notification: Notification, coalescer: NotificationCoalescer):
+        self.notification = notification
+        self.coalescer = coalescer
+
+    @property
+    def recipient(self) -> str:
+        return self.notification.recipient
+
+    def send(self, title: str, message: str) -> None:
+        self.coalescer.send(self.notification, title, message)
+
+
+# 7. Load test with local fake channels
+class FakeChannelNotification(Notification):
+    def __init__(self, delay: float = 0.0, failure_rate: float = 0.0):
+        self.delay = delay
+        self.failure_rate = failure_rate
+
+    def send(self, title: str, message: str) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+        if random.random() < self.failure_rate:
+            raise ConnectionError('Simulated delivery failure.')
+
+
+class FakeEmailChannel(FakeChannelNotification):
+    pass
+
+
+class FakeSMSChannel(FakeChannelNotification):
+    pass
+
+
+def load_test(total: int = 100_000) -> None:
+    """Push `total` notifications through fake email and (slow, flaky) SMS channels."""
+    dispatcher = NotificationDispatcher(queue_size=5_000, base_delay=0.001)
+    channels = [FakeEmailChannel(), FakeSMSChannel(delay=0.0001, failure_rate=0.01)]
+    start = time.perf_counter()
+    submit_time = 0.0
+    for index in range(total):
+        submitted = time.perf_counter()
+        dispatcher.submit(channels[index % 2], 'Alert', f'Alert #{index}', timeout=1.0)
+        submit_time += time.perf_counter() - submitted
+    dispatcher.close()
+    elapsed = time.perf_counter() - start
+    print(f'{total:,} notifications in {elapsed:.2f} s ({total / elapsed:,.0f}/s)')
+    print(f'mean submit() cost: {submit_time / total * 1e6:.1f} us')
+    for name, stats in dispatcher.stats().items():
+        latency = stats.pop('latency')
+        print(name, stats, {key: latency[key] for key in ('mean_ms', 'p50_ms', 'p99_ms')})
+
+
+class _SlackStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests[self.path] = self.server.requests.get(self.path, 0) + 1
+        status = 200
+        if self.path == '/api/auth':
+            payload = {'token': uuid.uuid4().hex, 'expires_in': 3600}
+            self.server.tokens.add(payload['token'])
+        elif self.headers.get('Authorization', '').removeprefix('Bearer ') in self.server.tokens:
+            payload = {'ok': True}
+        else:
+            status, payload = 401, {'ok': False, 'error': 'invalid_auth'}
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def benchmark_slack(messages: int = 2000) -> None:
+    """Round trips and connections per message against a local Slack stub server."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SlackStubHandler)
+    server.daemon_threads = True
+    server.tokens = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    def send_uncached(index: int) -> None:
+        # Previous behaviour: authorize before every message, fresh connection per call
+        session = SlackSession('bench', 'key', base_url, pool_size=1)
+        session.token()
+        session._connections = queue.LifoQueue(1)
+        session.request('/api/chat.postMessage', {'channel': 'C1', 'text': f'#{index}'}, session._token)
+
+    notifier = SlackNotification('bench', 'key', 'C1', base_url)
+    for label, send in (
+        ('authorize every send', send_uncached),
+        ('cached token + pool', lambda index: notifier.send('Alert', f'#{index}')),
+    ):
+        server.connections = 0
+        server.requests = {}
+        start = time.perf_counter()
+        for index in range(messages):
+            send(index)
+        elapsed = time.perf_counter() - start
+        round_trips = sum(server.requests.values())
+        print(
+            f'{label:<22} {round_trips / messages:.2f} round trips/msg, '
+            f'{server.connections / messages:.3f} connections/msg, {messages / elapsed:,.0f} msg/s'
+        )
+
+    # A revoked token surfaces as an error the dispatcher retries, after a re-authorization
+    server.tokens.clear()
+    dispatcher = NotificationDispatcher(base_delay=0.001)
+    dispatcher.submit(notifier, 'Alert', 'after token revocation')
+    dispatcher.close()
+    counters = dispatcher.stats()['SlackNotification']
+    print(f"revoked token: sent={counters['sent']} retries={counters['retries']} failed={counters['failed']}")
+    server.shutdown()
+
+
 if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        load_test()
+        benchmark_slack()
+        sys.exit()
+
     email_notifier = EmailNotification('admin@example.com')
     email_notifier.send('Email Title', 'This is a test email message.')
 
     slack_notifier = SlackNotification('user_login', 'api_key', 'chat_id_123')
     slack_notifier.send('Slack Title', 'This is a test Slack message.')
+    SlackNotification('user_login', 'api_key', 'chat_id_456').send(
+        'Slack Title', 'Reuses the cached authorization.'
+    )
 
     sms_notifier = SMSNotification('+1234567890', 'SenderName')
     sms_notifier.send('SMS Title', 'This is a test SMS message.')
+
+    dispatcher = NotificationDispatcher(workers_per_channel=1)
+    for notifier in (email_notifier, slack_notifier, sms_notifier):
+        dispatcher.submit(notifier, 'Dispatched Title', 'Sent from a background worker.')
+    dispatcher.close()
+    print({name: stats['sent'] for name, stats in dispatcher.stats().items()})
+
+    coalescer = NotificationCoalescer(window=5.0, max_batch=50)
+    incident_sms = CoalescingNotification(sms_notifier, coalescer)
+    for attempt in range(120):
+        incident_sms.send('DB down', f'Primary unreachable (check #{attempt % 3})')
+    coalescer.close()
+    print(f'Coalesced {coalescer.received} sends into {coalescer.delivered} messages')
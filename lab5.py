@@ -1,46 +1,231 @@
+import gzip
+import hashlib
+import html
+import io
+import itertools
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Hashable, Iterable, Optional
+from html.parser import HTMLParser
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape as _xml_escape
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+
+# Characters XML 1.0 does not allow at all, even escaped
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def _finite(value):
+    """Copy of value with NaN and infinities replaced by None, as orjson writes them."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def json_dumps(value) -> str:
+    """Encode JSON with orjson when it is installed, else the stdlib encoder.
+
+    Values orjson rejects (ints over 64 bits, lone surrogates) fall back to
+    the stdlib, and both write non-finite floats as null.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode()
+        except TypeError:
+            pass
+    try:
+        return _json_encoder.encode(value)
+    except ValueError:
+        return _json_encoder.encode(_finite(value))
+
+
+def xml_text(value) -> str:
+    """Escape a value for XML element content."""
+    return _xml_escape(_XML_INVALID.sub('\ufffd', str(value)))
+
+
+def html_text(value) -> str:
+    """Escape a value for HTML content or a quoted attribute."""
+    return html.escape(str(value), quote=True)
+
+
+def content_fingerprint(*fields) -> bytes:
+    """Short content hash used to key cached renders."""
+    return hashlib.blake2b(repr(fields).encode(), digest_size=16).digest()
+
+
+# 0. Shared render cache
+class RenderCache:
+    """Thread-safe LRU of rendered pages, bounded by entry count and encoded size.
+
+    Keys are (renderer type, page type, content fingerprint). Renderers are
+    stateless, so their type identifies the output. A content change gives a
+    new fingerprint, and stale renders age out of the LRU.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> str:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        output = render()
+        size = len(output.encode())
+        if size > self.max_bytes or self.max_entries <= 0:
+            return output
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (output, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return output
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+default_render_cache = RenderCache()
 
 
 # 1. Define the Page abstraction
 class Page(ABC):
-    def __init__(self, renderer):
+    def __init__(self, renderer, cache: Optional[RenderCache] = None):
         self.renderer = renderer
+        self.cache = cache if cache is not None else default_render_cache
 
     @abstractmethod
     def render(self) -> str:
         pass
 
+    def _render_cached(self, fingerprint: bytes, render: Callable[[], str]) -> str:
+        key = (type(self.renderer), type(self), fingerprint)
+        return self.cache.get_or_render(key, render)
+
 
 # 2. Implement concrete page classes
 class SimplePage(Page):
-    def __init__(self, title: str, content: str, renderer):
-        super().__init__(renderer)
+    def __init__(self, title: str, content: str, renderer, cache: Optional[RenderCache] = None):
+        super().__init__(renderer, cache)
         self.title = title
         self.content = content
 
     def render(self) -> str:
-        return self.renderer.render_simple_page(self.title, self.content)
+        return self._render_cached(
+            content_fingerprint(self.title, self.content),
+            lambda: self.renderer.render_simple_page(self.title, self.content),
+        )
 
 
 class Product:
+    __slots__ = ('product_id', 'name', 'description', 'image', '_fingerprint', '_encoded')
+    _FIELDS = frozenset({'product_id', 'name', 'description', 'image'})
+
     def __init__(self, product_id: int, name: str, description: str, image: str):
         self.product_id = product_id
         self.name = name
         self.description = description
         self.image = image
 
+    def __setattr__(self, name: str, value) -> None:
+        super().__setattr__(name, value)
+        if name in self._FIELDS:
+            super().__setattr__('_fingerprint', None)
+            super().__setattr__('_encoded', None)
+
+    def encoded(self, encode: Callable[['Product'], str]) -> str:
+        """encode(self), kept until a field changes or another encoder is used.
+
+        Only the latest encoder's output is kept, so a product holds at most
+        one extra copy; whole pages are cached in RenderCache instead.
+        """
+        cached = self._encoded
+        if cached is not None and cached[0] is encode:
+            return cached[1]
+        value = encode(self)
+        self._encoded = (encode, value)
+        return value
+
+    @property
+    def fingerprint(self) -> bytes:
+        """Content hash of the product fields, recomputed only after a field changes."""
+        if self._fingerprint is None:
+            self._fingerprint = content_fingerprint(
+                self.product_id, self.name, self.description, self.image
+            )
+        return self._fingerprint
+
 
 class ProductPage(Page):
-    def __init__(self, product: Product, renderer):
-        super().__init__(renderer)
+    def __init__(self, product: Product, renderer, cache: Optional[RenderCache] = None):
+        super().__init__(renderer, cache)
         self.product = product
 
     def render(self) -> str:
-        return self.renderer.render_product_page(self.product)
+        return self._render_cached(
+            self.product.fingerprint,
+            lambda: self.renderer.render_product_page(self.product),
+        )
 
 
 # 3. Define the Renderer interface
 class Renderer(ABC):
+    # Pieces of a streamed product listing: header, items joined by the
+    # separator, then footer
+    listing_header = ''
+    listing_separator = '\n'
+    listing_footer = ''
+
     @abstractmethod
     def render_simple_page(self, title: str, content: str) -> str:
         pass
@@ -49,49 +234,281 @@ class Renderer(ABC):
     def render_product_page(self, product: Product) -> str:
         pass
 
+    def render_listing_item(self, product: Product) -> str:
+        """One product as an element of a listing document."""
+        return self.render_product_page(product)
+
+    def render_products(
+        self,
+        products: Iterable[Product],
+        sink,
+        chunk_size: int = 64 * 1024,
+        processes: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> int:
+        """Stream products as one listing document into a file-like sink.
+
+        Output is buffered into writes of about chunk_size characters. Binary
+        sinks such as gzip files receive UTF-8. With `processes`, batches are
+        rendered in a process pool. Results are written in input order, and
+        only a few batches are in flight at a time, so memory stays bounded.
+        Returns the number of products written.
+        """
+        encode = not isinstance(sink, io.TextIOBase)
+        buffer = []
+        buffered = 0
+        written = 0
+
+        def emit(text: str) -> None:
+            nonlocal buffered
+            buffer.append(text)
+            buffered += len(text)
+            if buffered >= chunk_size:
+                flush()
+
+        def flush() -> None:
+            nonlocal buffered
+            data = ''.join(buffer)
+            sink.write(data.encode() if encode else data)
+            buffer.clear()
+            buffered = 0
+
+        emit(self.listing_header)
+        for rendered, count in self._render_batches(products, processes, batch_size):
+            if written:
+                emit(self.listing_separator)
+            emit(rendered)
+            written += count
+        emit(self.listing_footer)
+        flush()
+        return written
+
+    def _render_batches(
+        self, products: Iterable[Product], processes: Optional[int], batch_size: int
+    ) -> Iterable[tuple[str, int]]:
+        iterator = iter(products)
+        batches = iter(lambda: list(itertools.islice(iterator, batch_size)), [])
+        if not processes:
+            for batch in batches:
+                yield _render_batch(self, batch), len(batch)
+            return
+        with ProcessPoolExecutor(processes) as pool:
+            pending = deque()
+            for batch in batches:
+                pending.append((pool.submit(_render_batch, self, batch), len(batch)))
+                if len(pending) >= 2 * processes:
+                    future, count = pending.popleft()
+                    yield future.result(), count
+            while pending:
+                future, count = pending.popleft()
+                yield future.result(), count
+
+
+def _render_batch(renderer: Renderer, products: list[Product]) -> str:
+    return renderer.listing_separator.join(map(renderer.render_listing_item, products))
+
 
 # 4. Implement concrete renderer classes
 class HTMLRenderer(Renderer):
     def render_simple_page(self, title: str, content: str) -> str:
+        title, content = html_text(title), html_text(content)
         return f'<html><head><title>{title}</title></head><body><h1>{title}</h1><p>{content}</p></body></html>'
 
     def render_product_page(self, product: Product) -> str:
+        return self._encode_page(product)
+
+    @staticmethod
+    def _encode_page(product: Product) -> str:
+        name = html_text(product.name)
+        return (
+            f'<html><head><title>{name}</title></head><body>'
+            f'<h1>{name}</h1>'
+            f"<img src='{html_text(product.image)}' alt='{name}'/>"
+            f'<p>ID: {html_text(product.product_id)}</p>'
+            f'<p>{html_text(product.description)}</p></body></html>'
+        )
+
+    listing_header = '<html><head><title>Products</title></head><body><ul>'
+    listing_separator = ''
+    listing_footer = '</ul></body></html>'
+
+    def render_listing_item(self, product: Product) -> str:
+        return product.encoded(self._encode_item)
+
+    @staticmethod
+    def _encode_item(product: Product) -> str:
+        name = html_text(product.name)
         return (
-            f'<html><head><title>{product.name}</title></head><body>'
-            f'<h1>{product.name}</h1>'
-            f"<img src='{product.image}' alt='{product.name}'/>"
-            f'<p>ID: {product.product_id}</p>'
-            f'<p>{product.description}</p></body></html>'
+            f'<li><h2>{name}</h2>'
+            f"<img src='{html_text(product.image)}' alt='{name}'/>"
+            f'<p>ID: {html_text(product.product_id)}</p>'
+            f'<p>{html_text(product.description)}</p></li>'
         )
 
 
 class JsonRenderer(Renderer):
+    listing_header = '['
+    listing_separator = ','
+    listing_footer = ']'
+
     def render_simple_page(self, title: str, content: str) -> str:
-        return f'{{"title": "{title}", "content": "{content}"}}'
+        return json_dumps({'title': title, 'content': content})
 
     def render_product_page(self, product: Product) -> str:
-        return (
-            f'{{"product_id": {product.product_id}, "name": "{product.name}", '
-            f'"description": "{product.description}", "image": "{product.image}"}}'
-        )
+        return self._encode(product)
+
+    def render_listing_item(self, product: Product) -> str:
+        return product.encoded(self._encode)
+
+    @staticmethod
+    def _encode(product: Product) -> str:
+        return json_dumps({
+            'product_id': product.product_id,
+            'name': product.name,
+            'description': product.description,
+            'image': product.image,
+        })
 
 
 class XmlRenderer(Renderer):
+    listing_header = '<?xml version="1.0" encoding="UTF-8"?><products>'
+    listing_separator = ''
+    listing_footer = '</products>'
+
     def render_simple_page(self, title: str, content: str) -> str:
-        return f'<page><title>{title}</title><content>{content}</content></page>'
+        return f'<page><title>{xml_text(title)}</title><content>{xml_text(content)}</content></page>'
 
     def render_product_page(self, product: Product) -> str:
+        return self._encode(product)
+
+    def render_listing_item(self, product: Product) -> str:
+        return product.encoded(self._encode)
+
+    @staticmethod
+    def _encode(product: Product) -> str:
         return (
             f'<product>'
-            f'<id>{product.product_id}</id>'
-            f'<name>{product.name}</name>'
-            f'<description>{product.description}</description>'
-            f'<image>{product.image}</image>'
+            f'<id>{xml_text(product.product_id)}</id>'
+            f'<name>{xml_text(product.name)}</name>'
+            f'<description>{xml_text(product.description)}</description>'
+            f'<image>{xml_text(product.image)}</image>'
             f'</product>'
         )
 
 
+# 5. Benchmarks
+def benchmark_render_cache(
+    catalog_size: int = 20_000, accesses: int = 300_000, update_rate: float = 0.01
+) -> None:
+    """Replay a Zipf-like catalog access trace with occasional product edits."""
+    rng = random.Random(42)
+    products = [
+        Product(i, f'Product {i}', f'Description of product {i}. ' * 8, f'http://example.com/{i}.png')
+        for i in range(catalog_size)
+    ]
+    weights = [1 / (rank + 1) for rank in range(catalog_size)]
+    trace = rng.choices(range(catalog_size), weights, k=accesses)
+    edits = {step for step in range(accesses) if rng.random() < update_rate}
+    renderers = [HTMLRenderer(), JsonRenderer(), XmlRenderer()]
+
+    for label, cache in (
+        ('no cache', RenderCache(max_entries=0)),
+        ('RenderCache', RenderCache(max_entries=5_000, max_bytes=8 * 1024 * 1024)),
+    ):
+        pages = [ProductPage(product, renderers[product.product_id % 3], cache) for product in products]
+        start = time.perf_counter()
+        for step, index in enumerate(trace):
+            if step in edits:
+                products[index].description += ' Updated.'
+            pages[index].render()
+        elapsed = time.perf_counter() - start
+        print(f'{label:<12} {accesses / elapsed:12,.0f} renders/s  {cache.stats()}')
+
+
+def benchmark_catalog_export(count: int = 200_000) -> None:
+    """Export a catalog as gzipped JSON sequentially and over a process pool."""
+    def catalog():
+        for i in range(count):
+            yield Product(i, f'Product {i}', f'Description of product {i}.', f'http://example.com/{i}.png')
+
+    for processes in (None, 4):
+        sink = io.BytesIO()
+        start = time.perf_counter()
+        with gzip.GzipFile(fileobj=sink, mode='wb') as gzip_sink:
+            JsonRenderer().render_products(catalog(), gzip_sink, processes=processes)
+        elapsed = time.perf_counter() - start
+        print(
+            f'processes={processes or 1}: {count / elapsed:10,.0f} products/s, '
+            f'{sink.tell() / 2 ** 20:.1f} MB gzipped'
+        )
+
+
+ADVERSARIAL_TEXT = (
+    'Say "hello" \\ goodbye',
+    "<script>alert('x')</script> & co",
+    ']]></description><injected/>',
+    'tabs\tnew\nlines\rand \x00\x01\x1f controls',
+    'unicode \u2028\u2029 \u00e9\u00e8 \U0001f600 \ufffe',
+    '{"json": [1, 2]}',
+)
+
+
+class _TextCollector(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.text = []
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+
+def benchmark_serialization(count: int = 50_000) -> None:
+    """Renderer throughput plus validity checks on adversarial product text."""
+    rng = random.Random(3)
+    products = [
+        Product(i, rng.choice(ADVERSARIAL_TEXT), rng.choice(ADVERSARIAL_TEXT), rng.choice(ADVERSARIAL_TEXT))
+        for i in range(count)
+    ]
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'stdlib json'}")
+    for renderer in (JsonRenderer(), XmlRenderer(), HTMLRenderer()):
+        start = time.perf_counter()
+        for product in products:
+            renderer.render_listing_item(product)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for product in products:
+            renderer.render_listing_item(product)
+        warm = time.perf_counter() - start
+        print(
+            f'{type(renderer).__name__:<13} {count / cold:12,.0f} renders/s cold'
+            f' {count / warm:12,.0f} renders/s pre-encoded'
+        )
+
+    sample = products[:len(ADVERSARIAL_TEXT) * 4]
+    listing = io.StringIO()
+    JsonRenderer().render_products(sample, listing)
+    decoded = json.loads(listing.getvalue())
+    assert [item['description'] for item in decoded] == [p.description for p in sample]
+
+    listing = io.BytesIO()
+    XmlRenderer().render_products(sample, listing)
+    parsed = ElementTree.fromstring(listing.getvalue())
+    assert len(parsed) == len(sample)
+
+    for product in sample:
+        collector = _TextCollector()
+        collector.feed(HTMLRenderer().render_product_page(product))
+        assert product.description.replace('\r', '\n') in ''.join(collector.text).replace('\r', '\n')
+    print('JSON, XML and HTML output valid for adversarial text')
+
+
 if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        benchmark_render_cache()
+        benchmark_catalog_export()
+        benchmark_serialization()
+        sys.exit()
+
     html_renderer = HTMLRenderer()
     json_renderer = JsonRenderer()
     xml_renderer = XmlRenderer()
@@ -109,3 +526,16 @@ if __name__ == '__main__':
     product_page.renderer = xml_renderer
     print('\nXML Product Page:')
     print(product_page.render())
+
+    product.description = 'A useful widget, now in blue.'
+    print('\nXML Product Page after an edit:')
+    print(product_page.render())
+    print(ProductPage(product, xml_renderer).render() is product_page.render())
+    print(default_render_cache.stats())
+
+    catalog = [product, Product(2, 'Gadget', 'A handy gadget.', 'http://example.com/gadget.png')]
+    for renderer in (json_renderer, xml_renderer, html_renderer):
+        listing = io.StringIO()
+        renderer.render_products(catalog, listing)
+        print(f'\n{type(renderer).__name__} listing:')
+        print(listing.getvalue())
@@ -1,4 +1,33 @@
+import asyncio
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
 from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Hashable, Iterable, NamedTuple, Optional
+
+
+class DownloadResult(NamedTuple):
+    url: str
+    data: Optional[str]
+    latency: float
+    error: Optional[BaseException] = None
+
+
+class Response(NamedTuple):
+    """Body plus metadata; header names are lower-case and body is None on 304."""
+
+    status: int
+    body: Optional[str]
+    headers: dict[str, str] = {}
 
 
 # 1. Interface Definition
@@ -8,6 +37,30 @@ class Downloader(ABC):
         """Download data from the given URL."""
         ...
 
+    def fetch(self, url: str, headers: Optional[dict[str, str]] = None) -> Response:
+        """Download with request headers and return the status and response headers too.
+
+        Downloaders without HTTP semantics ignore conditional headers and
+        always answer 200 with no metadata.
+        """
+        return Response(200, self.download(url))
+
+    async def download_many(self, urls: Iterable[str], concurrency: int = 10) -> list[DownloadResult]:
+        """Download URLs concurrently, at most `concurrency` at a time, with per-URL latency."""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(concurrency)
+        with ThreadPoolExecutor(concurrency) as pool:
+            async def fetch(url: str) -> DownloadResult:
+                async with slots:
+                    start = time.perf_counter()
+                    try:
+                        data = await loop.run_in_executor(pool, self.download, url)
+                    except Exception as exc:
+                        return DownloadResult(url, None, time.perf_counter() - start, exc)
+                    return DownloadResult(url, data, time.perf_counter() - start)
+
+            return await asyncio.gather(*(fetch(url) for url in urls))
+
 
 # 2. Concrete Implementation
 class SimpleDownloader(Downloader):
@@ -17,30 +70,692 @@ class SimpleDownloader(Downloader):
         return f'Data from {url}'
 
 
-# 3. Proxy Implementation with Caching
+class HTTPDownloader(Downloader):
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+
+    def download(self, url: str) -> str:
+        """Fetch the URL over HTTP(S) and decode the body."""
+        return self.fetch(url).body
+
+    def fetch(self, url: str, headers: Optional[dict[str, str]] = None) -> Response:
+        request = urllib.request.Request(url, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                charset = response.headers.get_content_charset() or 'utf-8'
+                body = response.read().decode(charset)
+                return Response(response.status, body, _lower_headers(response.headers))
+        except urllib.error.HTTPError as exc:
+            if exc.code != 304:
+                raise
+            return Response(304, None, _lower_headers(exc.headers))
+
+
+def _lower_headers(headers) -> dict[str, str]:
+    return {name.lower(): value for name, value in headers.items()}
+
+
+# 3. Cache with pluggable eviction and an optional disk tier
+class EvictionPolicy(ABC):
+    """Tracks key usage and picks which key to evict when the cache is full."""
+
+    @abstractmethod
+    def on_insert(self, key: Hashable) -> None: ...
+
+    @abstractmethod
+    def on_access(self, key: Hashable) -> None: ...
+
+    @abstractmethod
+    def on_remove(self, key: Hashable) -> None: ...
+
+    @abstractmethod
+    def victim(self) -> Hashable: ...
+
+
+class LRUPolicy(EvictionPolicy):
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def on_insert(self, key: Hashable) -> None:
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def on_access(self, key: Hashable) -> None:
+        self._order.move_to_end(key)
+
+    def on_remove(self, key: Hashable) -> None:
+        self._order.pop(key, None)
+
+    def victim(self) -> Hashable:
+        return next(iter(self._order))
+
+
+class FIFOPolicy(LRUPolicy):
+    """Evicts in insertion order; with a fixed TTL that is also soonest-to-expire first."""
+
+    def on_access(self, key: Hashable) -> None:
+        pass
+
+
+class LFUPolicy(EvictionPolicy):
+    """Least frequently used, ties broken by least recently used, all O(1)."""
+
+    def __init__(self):
+        self._counts: dict[Hashable, int] = {}
+        self._buckets: defaultdict[int, OrderedDict] = defaultdict(OrderedDict)
+        self._min_count = 0
+
+    def on_insert(self, key: Hashable) -> None:
+        self.on_remove(key)
+        self._counts[key] = 1
+        self._buckets[1][key] = None
+        self._min_count = 1
+
+    def on_access(self, key: Hashable) -> None:
+        count = self._counts[key]
+        del self._buckets[count][key]
+        if not self._buckets[count]:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets[count + 1][key] = None
+
+    def on_remove(self, key: Hashable) -> None:
+        count = self._counts.pop(key, None)
+        if count is None:
+            return
+        del self._buckets[count][key]
+        if not self._buckets[count]:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = min(self._buckets, default=0)
+
+    def victim(self) -> Hashable:
+        return next(iter(self._buckets[self._min_count]))
+
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, CachedResponse):
+        return _sizeof(value.body)
+    return sys.getsizeof(value)
+
+
+class SqliteCacheTier:
+    """Persistent second tier: pickled values in an sqlite file that survives restarts.
+
+    Bounded by max_entries and max_bytes (pickled size), evicting the least
+    recently used rows, and expired rows are swept at most every sweep_interval
+    seconds. The file runs in WAL mode with synchronous=NORMAL, so a write
+    appends to the log instead of forcing an fsync per commit.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = 100_000,
+        max_bytes: Optional[int] = 1 << 30,
+        sweep_interval: float = 60.0,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        self.expirations = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache '
+            '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)'
+        )
+        columns = {row[1] for row in self._connection.execute('PRAGMA table_info(cache)')}
+        if 'size' not in columns:
+            self._connection.execute('ALTER TABLE cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0')
+            self._connection.execute('UPDATE cache SET size = length(value)')
+        if 'accessed_at' not in columns:
+            self._connection.execute('ALTER TABLE cache ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+        self._connection.commit()
+        self._lock = threading.Lock()
+        self._entries, self._bytes = self._connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache'
+        ).fetchone()
+        self._last_sweep = 0.0
+
+    def get(self, key: str) -> tuple[Any, Optional[float]]:
+        """Return (value, expires_at) or (None, None) when absent or expired."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None, None
+            blob, expires_at = row
+            now = time.time()
+            if expires_at is not None and expires_at <= now:
+                self._delete(key)
+                self._connection.commit()
+                self.expirations += 1
+                return None, None
+            self._connection.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self._connection.commit()
+        return pickle.loads(blob), expires_at
+
+    def set(self, key: str, value: Any, expires_at: Optional[float]) -> None:
+        blob = pickle.dumps(value)
+        with self._lock:
+            now = time.time()
+            self._delete(key)
+            if self.max_bytes is None or len(blob) <= self.max_bytes:
+                self._connection.execute(
+                    'INSERT INTO cache (key, value, expires_at, size, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                    (key, blob, expires_at, len(blob), now),
+                )
+                self._entries += 1
+                self._bytes += len(blob)
+            if now - self._last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            self._evict()
+            self._connection.commit()
+
+    def _delete(self, key: str) -> None:
+        row = self._connection.execute('SELECT size FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            self._connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+            self._entries -= 1
+            self._bytes -= row[0]
+
+    def _sweep(self, now: float) -> None:
+        count, size = self._connection.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE expires_at <= ?', (now,)
+        ).fetchone()
+        self._connection.execute('DELETE FROM cache WHERE expires_at <= ?', (now,))
+        self._entries -= count
+        self._bytes -= size
+        self.expirations += count
+        self._last_sweep = now
+
+    def _over_limit(self) -> bool:
+        return (
+            (self.max_entries is not None and self._entries > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        )
+
+    def _evict(self) -> None:
+        while self._over_limit():
+            victims = self._connection.execute(
+                'SELECT key, size FROM cache ORDER BY accessed_at LIMIT 64'
+            ).fetchall()
+            for key, size in victims:
+                if not self._over_limit():
+                    return
+                self._connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self._entries -= 1
+                self._bytes -= size
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._delete(key)
+            self._connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute('DELETE FROM cache')
+            self._connection.commit()
+            self._entries = self._bytes = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._entries
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class DownloadCache:
+    """Thread-safe in-memory cache bounded by entries and bytes, with optional TTL.
+
+    The policy picks victims whenever max_entries or max_bytes would be
+    exceeded, and entries older than ttl seconds count as misses. With a
+    disk tier, writes go through to disk, and a memory miss is looked up
+    there and promoted, so cached data survives a restart.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[EvictionPolicy] = None,
+        max_entries: Optional[int] = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        disk: Optional[SqliteCacheTier] = None,
+        sizeof: Callable[[Any], int] = _sizeof,
+    ):
+        self.policy = policy if policy is not None else LRUPolicy()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk = disk
+        self.sizeof = sizeof
+        self._entries: dict[Hashable, tuple[Any, int, Optional[float]]] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, _, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self.policy.on_access(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+
+        if self.disk is not None:
+            value, expires_at = self.disk.get(key)
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, value, expires_at)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def __contains__(self, key: Hashable) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self.disk is not None:
+            self.disk.set(key, value, expires_at)
+
+    def _store(self, key: Hashable, value: Any, expires_at: Optional[float]) -> None:
+        if key in self._entries:
+            self._remove(key)
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+        self.policy.on_insert(key)
+        while (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            self._remove(self.policy.victim())
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        self.policy.on_remove(key)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+
+# 4. Proxy Implementation with Caching
+def _cache_control(headers: dict[str, str]) -> dict[str, Optional[str]]:
+    directives = {}
+    for part in headers.get('cache-control', '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+class CachedResponse(NamedTuple):
+    """A cached body with its validators; fresh_until is None for 'fresh forever'.
+
+    must_revalidate marks no-cache / must-revalidate responses, which may not
+    be served once stale until the origin has confirmed them.
+    """
+
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh_until: Optional[float]
+    must_revalidate: bool = False
+
+    @classmethod
+    def from_response(
+        cls, response: Response, default_max_age: Optional[float], previous: Optional['CachedResponse'] = None
+    ) -> Optional['CachedResponse']:
+        """Build the entry to cache, or None when the response says no-store.
+
+        A 304 carries no body, so the previous entry's body and any
+        validators or Cache-Control the server did not resend are kept.
+        """
+        headers = response.headers
+        directives = _cache_control(headers)
+        if 'no-store' in directives:
+            return None
+        now = time.time()
+        if 'no-cache' in directives:
+            fresh_until = now
+        elif 'max-age' in directives:
+            try:
+                fresh_until = now + max(0, int(directives['max-age']))
+            except (TypeError, ValueError):
+                fresh_until = now
+        elif default_max_age is not None:
+            fresh_until = now + default_max_age
+        else:
+            fresh_until = None
+        must_revalidate = 'no-cache' in directives or 'must-revalidate' in directives
+        if response.status == 304:
+            if 'cache-control' not in headers and previous.must_revalidate:
+                fresh_until, must_revalidate = now, True
+            return cls(
+                previous.body,
+                headers.get('etag', previous.etag),
+                headers.get('last-modified', previous.last_modified),
+                fresh_until,
+                must_revalidate,
+            )
+        return cls(
+            response.body, headers.get('etag'), headers.get('last-modified'), fresh_until, must_revalidate
+        )
+
+    def is_fresh(self) -> bool:
+        return self.fresh_until is None or time.time() < self.fresh_until
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
 class CachingDownloader(Downloader):
-    def __init__(self, downloader: Downloader):
+    """Caching proxy with HTTP freshness and conditional revalidation.
+
+    Entries are fresh for the response's Cache-Control max-age, or for
+    default_max_age when the downloader sends none (None: forever). A stale
+    entry is returned immediately while a background fetch revalidates it
+    with If-None-Match / If-Modified-Since, so an unchanged resource costs
+    a 304 instead of the whole body. Entries marked no-cache or
+    must-revalidate are instead revalidated before they are returned.
+    Concurrent misses and revalidations of one URL share a single in-flight
+    fetch.
+    """
+
+    def __init__(
+        self,
+        downloader: Downloader,
+        cache: Optional[DownloadCache] = None,
+        default_max_age: Optional[float] = None,
+        revalidation_workers: int = 4,
+    ):
         self.downloader = downloader
-        self.cache = {}
+        self.cache = cache if cache is not None else DownloadCache()
+        self.default_max_age = default_max_age
+        self._in_flight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._revalidator = ThreadPoolExecutor(revalidation_workers, thread_name_prefix='revalidate')
+        self.stale_served = 0
+        self.not_modified = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
 
     def download(self, url: str) -> str:
-        if url in self.cache:
-            print(f'Returning cached data for {url}.')
-            return self.cache[url]
+        entry = self.cache.get(url)
+        if entry is not None:
+            if entry.is_fresh():
+                print(f'Returning cached data for {url}.')
+                return entry.body
+            if not entry.must_revalidate:
+                print(f'Returning stale data for {url} while revalidating.')
+                with self._lock:
+                    self.stale_served += 1
+                    if url not in self._in_flight:
+                        future = self._in_flight[url] = Future()
+                        try:
+                            self._revalidator.submit(self._revalidate, url, future, entry)
+                        except RuntimeError as exc:
+                            # Shut down: don't leave a future nobody will resolve
+                            del self._in_flight[url]
+                            future.set_exception(exc)
+                            print(f'Revalidation of {url} skipped: {exc}')
+                return entry.body
+
+        with self._lock:
+            future = self._in_flight.get(url)
+            is_leader = future is None
+            if is_leader:
+                future = self._in_flight[url] = Future()
+        if not is_leader:
+            print(f'Waiting for in-flight download of {url}.')
+            return future.result()
+
+        # The previous leader may have filled the cache just before we registered
+        entry = self.cache.get(url)
+        if entry is not None and entry.is_fresh():
+            self._finish(url, future, entry.body)
+            return entry.body
+        if entry is not None:
+            print(f'Revalidating {url} before use.')
+        else:
+            print(f'Cache miss for {url}. Downloading...')
+        return self._fetch(url, future, entry)
+
+    def _revalidate(self, url: str, future: Future, entry: CachedResponse) -> None:
+        try:
+            self._fetch(url, future, entry)
+        except Exception as exc:
+            print(f'Revalidation of {url} failed: {exc!r}')
+
+    def _fetch(self, url: str, future: Future, entry: Optional[CachedResponse]) -> str:
+        try:
+            response = self.downloader.fetch(url, entry.conditional_headers() if entry is not None else None)
+            if response.status == 304 and entry is not None:
+                with self._lock:
+                    self.not_modified += 1
+                    self.bytes_saved += _sizeof(entry.body)
+            else:
+                with self._lock:
+                    self.bytes_downloaded += _sizeof(response.body)
+            updated = CachedResponse.from_response(response, self.default_max_age, entry)
+            if updated is not None:
+                self.cache.set(url, updated)
+                body = updated.body
+            else:
+                self.cache.delete(url)
+                body = response.body if response.status != 304 else entry.body
+        except BaseException as exc:
+            self._finish(url, future, exception=exc)
+            raise
+        self._finish(url, future, body)
+        return body
+
+    def _finish(
+        self, url: str, future: Future, body: Optional[str] = None, exception: Optional[BaseException] = None
+    ) -> None:
+        with self._lock:
+            del self._in_flight[url]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(body)
 
-        print(f'Cache miss for {url}. Downloading...')
-        data = self.downloader.download(url)
-        self.cache[url] = data
-        return data
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'stale_served': self.stale_served,
+                'not_modified': self.not_modified,
+                'bytes_downloaded': self.bytes_downloaded,
+                'bytes_saved': self.bytes_saved,
+            }
 
+    def close(self) -> None:
+        """Wait for background revalidations to finish."""
+        self._revalidator.shutdown(wait=True)
 
-# 4. Client Code Example
+
+# 5. Client Code Example
 def client_code(downloader: Downloader, url: str):
     print(downloader.download(url))
     print(downloader.download(url))
 
 
+# 6. Benchmarks against a local HTTP stub server
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.delay)
+        size = self.server.body_size if self.path.startswith('/large') else 0
+        body = f'Body of {self.path} v{self.server.version}'.ljust(size).encode()
+        etag = f'"{self.server.version}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            body = b''
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', self.server.cache_control or f'max-age={self.server.max_age}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(
+    delay: float = 0.05, max_age: int = 60, body_size: int = 1 << 20, cache_control: Optional[str] = None
+) -> ThreadingHTTPServer:
+    """Serve versioned bodies with an ETag; paths under /large are padded to body_size.
+
+    Responses carry Cache-Control: max-age=<max_age> unless cache_control overrides it.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.max_age = max_age
+    server.body_size = body_size
+    server.cache_control = cache_control
+    server.version = 1
+    server.requests = 0
+    server.bytes_sent = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark_downloads(count: int = 100) -> None:
+    """download_many speed-up and single-flight request savings."""
+    server = start_stub_server()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    urls = [f'{base_url}/resource/{index}' for index in range(count)]
+
+    for concurrency in (1, 20):
+        start = time.perf_counter()
+        results = asyncio.run(HTTPDownloader().download_many(urls, concurrency))
+        elapsed = time.perf_counter() - start
+        latencies = sorted(result.latency for result in results)
+        print(
+            f'concurrency={concurrency:<3} {count / elapsed:7.1f} URLs/s, '
+            f'p50 latency {latencies[len(latencies) // 2] * 1000:.0f} ms'
+        )
+
+    server.requests = 0
+    caching_downloader = CachingDownloader(HTTPDownloader())
+    threads = [
+        threading.Thread(target=caching_downloader.download, args=(f'{base_url}/hot',))
+        for _ in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f'20 concurrent misses on one URL -> {server.requests} upstream request(s)')
+    server.shutdown()
+
+
+def benchmark_revalidation(rounds: int = 20) -> None:
+    """Bytes transferred for a large, rarely-changing resource that is always stale."""
+    server = start_stub_server(delay=0, max_age=0)
+    url = f'http://127.0.0.1:{server.server_port}/large/report'
+    downloader = CachingDownloader(HTTPDownloader())
+    start = time.perf_counter()
+    for round_number in range(rounds):
+        if round_number == rounds // 2:
+            server.version += 1
+        downloader.download(url)
+        # Let the background revalidation land before the next read
+        with downloader._lock:
+            pending = downloader._in_flight.get(url)
+        if pending is not None:
+            pending.result()
+    elapsed = time.perf_counter() - start
+    downloader.close()
+    full_bytes = rounds * server.body_size
+    print(
+        f'{rounds} reads of a {server.body_size >> 10} KiB resource with max-age=0: '
+        f'{server.requests} requests, {server.bytes_sent >> 10} KiB sent '
+        f'(vs {full_bytes >> 10} KiB unconditional) in {elapsed * 1000:.0f} ms'
+    )
+    print(downloader.stats())
+    server.shutdown()
+
+
 if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        benchmark_downloads()
+        benchmark_revalidation()
+        sys.exit()
+
     url = 'http://example.com/resource'
 
     print('Using SimpleDownloader:')
@@ -50,3 +765,44 @@ if __name__ == '__main__':
     print('\nUsing CachingDownloader:')
     caching_downloader = CachingDownloader(simple_downloader)
     client_code(caching_downloader, url)
+
+    print('\nUsing CachingDownloader with a bounded LFU cache and a disk tier:')
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_path = os.path.join(cache_dir, 'downloads.sqlite')
+        cache = DownloadCache(LFUPolicy(), max_entries=2, ttl=3600, disk=SqliteCacheTier(cache_path))
+        bounded_downloader = CachingDownloader(simple_downloader, cache)
+        for resource in ('a', 'a', 'b', 'c', 'a'):
+            bounded_downloader.download(f'http://example.com/{resource}')
+        print(cache.stats())
+        cache.disk.close()
+
+        print('After a restart:')
+        restarted = CachingDownloader(simple_downloader, DownloadCache(disk=SqliteCacheTier(cache_path)))
+        client_code(restarted, 'http://example.com/b')
+        print(restarted.cache.stats())
+        restarted.cache.disk.close()
+
+    print('\nRevalidating stale entries against a local HTTP server:')
+    server = start_stub_server(delay=0, max_age=0, body_size=0)
+    http_downloader = CachingDownloader(HTTPDownloader())
+    stub_url = f'http://127.0.0.1:{server.server_port}/resource'
+    http_downloader.download(stub_url)
+    print(http_downloader.download(stub_url))
+    http_downloader.close()
+    print(http_downloader.stats())
+    server.shutdown()
+
+    print('\nRevalidating no-cache entries before use:')
+    server = start_stub_server(delay=0, body_size=0, cache_control='no-cache')
+    http_downloader = CachingDownloader(HTTPDownloader())
+    stub_url = f'http://127.0.0.1:{server.server_port}/resource'
+    http_downloader.download(stub_url)
+    server.version += 1
+    print(http_downloader.download(stub_url))
+    http_downloader.close()
+    print(http_downloader.stats())
+    server.shutdown()
+
+    print('\nConcurrent downloads:')
+    for result in asyncio.run(simple_downloader.download_many([f'{url}/{i}' for i in range(3)])):
+        print(f'{result.url}: {result.data!r} in {result.latency * 1000:.2f} ms')
@@ -1,4 +1,43 @@
+import csv
+import json
+import operator
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
 from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
+from itertools import repeat
+from typing import NamedTuple, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Amounts = Union[Sequence[float], 'np.ndarray']
+
+
+def _as_array(amounts: Amounts):
+    """Return amounts as a float64 ndarray, or an array('d') without NumPy."""
+    if np is not None:
+        return np.asarray(amounts, dtype=np.float64)
+    if isinstance(amounts, array) and amounts.typecode == 'd':
+        return amounts
+    return array('d', amounts)
+
+
+def _zeros(count: int):
+    return np.zeros(count) if np is not None else array('d', bytes(8 * count))
+
+
+def _scale(amounts: Amounts, factor: float):
+    if np is not None:
+        return _as_array(amounts) * factor
+    return array('d', map(operator.mul, amounts, repeat(factor)))
 
 
 # Strategy Interface
@@ -8,24 +47,145 @@ class DeliveryStrategy(ABC):
         """Calculate the delivery cost based on the strategy."""
         ...
 
+    def calculate_costs(self, amounts: Amounts):
+        """Calculate costs for a batch of orders, returning an ndarray (or array('d') without NumPy).
+
+        The default calls calculate_cost per order; built-in strategies
+        override it with a vectorized version.
+        """
+        if np is not None:
+            return np.fromiter(map(self.calculate_cost, amounts), dtype=np.float64, count=len(amounts))
+        return array('d', map(self.calculate_cost, amounts))
+
 
 # Concrete Strategy: Pickup (No delivery cost)
 class PickupStrategy(DeliveryStrategy):
     def calculate_cost(self, order_amount: float) -> float:
         return 0.0
 
+    def calculate_costs(self, amounts: Amounts):
+        return _zeros(len(amounts))
+
 
 # Concrete Strategy: External Delivery Service
 class ExternalDeliveryStrategy(DeliveryStrategy):
     def calculate_cost(self, order_amount: float) -> float:
         return order_amount * 10.0
 
+    def calculate_costs(self, amounts: Amounts):
+        return _scale(amounts, 10.0)
+
 
 # Concrete Strategy: Own Delivery Service
 class OwnDeliveryStrategy(DeliveryStrategy):
     def calculate_cost(self, order_amount: float) -> float:
         return order_amount * 5.0
 
+    def calculate_costs(self, amounts: Amounts):
+        return _scale(amounts, 5.0)
+
+
+# Concrete Strategy: Table-driven tariff loaded from a rules file
+class TariffRule(NamedTuple):
+    """From `threshold` upwards (until the next threshold) a band costs flat + rate * value.
+
+    basis selects what value is: the order amount or the parcel weight. An
+    order pays its amount band plus its weight band within its zone.
+    """
+
+    zone: str
+    basis: str
+    threshold: float
+    flat: float
+    rate: float
+
+
+TARIFF_BASES = ('amount', 'weight')
+
+
+def load_tariff_rules(path: str) -> list[TariffRule]:
+    """Read rules from a .json list of objects or a .csv with a header row."""
+    with open(path, newline='') as file:
+        rows = json.load(file) if path.endswith('.json') else list(csv.DictReader(file))
+    rules = []
+    for row in rows:
+        rule = TariffRule(
+            str(row['zone']), str(row['basis']), float(row['threshold']), float(row['flat']), float(row['rate'])
+        )
+        if rule.basis not in TARIFF_BASES:
+            raise ValueError(f'Unknown tariff basis {rule.basis!r} for zone {rule.zone!r}')
+        rules.append(rule)
+    return rules
+
+
+class _Bands(NamedTuple):
+    thresholds: list[float]
+    prices: list[tuple[float, float]]
+
+    def price(self, value: float) -> float:
+        index = bisect_right(self.thresholds, value) - 1
+        if index < 0:
+            return 0.0
+        flat, rate = self.prices[index]
+        return flat + rate * value
+
+
+def compile_tariff(rules: Sequence[TariffRule]) -> dict[tuple[str, str], _Bands]:
+    """Index rules by (zone, basis) into sorted breakpoints; a later duplicate threshold wins."""
+    grouped: dict[tuple[str, str], dict[float, tuple[float, float]]] = {}
+    for rule in rules:
+        grouped.setdefault((rule.zone, rule.basis), {})[rule.threshold] = (rule.flat, rule.rate)
+    table = {}
+    for key, bands in grouped.items():
+        thresholds = sorted(bands)
+        table[key] = _Bands(thresholds, [bands[threshold] for threshold in thresholds])
+    return table
+
+
+class TariffStrategy(DeliveryStrategy):
+    """Prices orders from a rules file compiled into per-zone bisect tables.
+
+    Each quote is two dict lookups plus two O(log n) bisects. reload()
+    compiles the new file off to the side and swaps the table reference in
+    one assignment, so calculations already running finish on the old
+    table and never wait for a reload.
+    """
+
+    def __init__(self, path: str, zone: str = 'default'):
+        self.path = path
+        self.zone = zone
+        self._reload_lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self.reload()
+
+    def reload(self) -> None:
+        """Load and compile the rules file, then publish it atomically."""
+        with self._reload_lock:
+            mtime = os.stat(self.path).st_mtime
+            table = compile_tariff(load_tariff_rules(self.path))
+            self._table, self._mtime = table, mtime
+
+    def reload_if_changed(self) -> bool:
+        if os.stat(self.path).st_mtime == self._mtime:
+            return False
+        self.reload()
+        return True
+
+    def quote(self, order_amount: float, weight: float = 0.0, zone: Optional[str] = None) -> float:
+        table = self._table
+        zone = self.zone if zone is None else zone
+        amount_bands = table.get((zone, 'amount'))
+        weight_bands = table.get((zone, 'weight'))
+        if amount_bands is None and weight_bands is None:
+            raise ValueError(f'No tariff rules for zone {zone!r}')
+        cost = amount_bands.price(order_amount) if amount_bands is not None else 0.0
+        if weight_bands is not None:
+            cost += weight_bands.price(weight)
+        return cost
+
+    def calculate_cost(self, order_amount: float) -> float:
+        return self.quote(order_amount)
+
 
 # Context class to use the strategy
 class DeliveryContext:
@@ -40,8 +200,137 @@ class DeliveryContext:
         """Calculate the delivery cost using the selected strategy."""
         return self._strategy.calculate_cost(order_amount)
 
+    def calculate_costs(self, amounts: Amounts):
+        """Calculate delivery costs for a batch of orders using the selected strategy."""
+        return self._strategy.calculate_costs(amounts)
+
+
+# Benchmark: per-order calls vs the batch API
+class _SurchargeStrategy(DeliveryStrategy):
+    """A custom strategy without a vectorized override."""
+
+    def calculate_cost(self, order_amount: float) -> float:
+        return order_amount * 5.0 + 2.0
+
+
+def benchmark_batch_costs(count: int = 10_000_000) -> None:
+    rng = random.Random(0)
+    amounts = array('d', (rng.uniform(1.0, 500.0) for _ in range(count)))
+    if np is not None:
+        amounts = np.frombuffer(amounts, dtype=np.float64)
+    print(f'{count:,} orders, backend: {"numpy" if np is not None else "array"}')
+
+    for strategy in (PickupStrategy(), OwnDeliveryStrategy(), ExternalDeliveryStrategy(), _SurchargeStrategy()):
+        context = DeliveryContext(strategy)
+        start = time.perf_counter()
+        per_order = array('d', map(context.calculate_delivery_cost, amounts))
+        per_order_time = time.perf_counter() - start
+        start = time.perf_counter()
+        batch = context.calculate_costs(amounts)
+        batch_time = time.perf_counter() - start
+        assert len(batch) == count and batch[count // 2] == per_order[count // 2]
+        print(
+            f'{type(strategy).__name__:<26} per-order {per_order_time:6.2f} s   '
+            f'batch {batch_time:6.3f} s   x{per_order_time / batch_time:.1f}'
+        )
+
+
+# Benchmark: tariff lookups vs a branching rule chain
+class _BranchingTariffStrategy(DeliveryStrategy):
+    """The if-chain a hand-written tariff turns into: test every rule in order."""
+
+    def __init__(self, rules: Sequence[TariffRule], zone: str = 'default'):
+        self.rules = rules
+        self.zone = zone
+
+    def quote(self, order_amount: float, weight: float = 0.0, zone: Optional[str] = None) -> float:
+        zone = self.zone if zone is None else zone
+        best = {}
+        for rule in self.rules:
+            if rule.zone == zone:
+                value = order_amount if rule.basis == 'amount' else weight
+                if rule.threshold <= value and rule.threshold >= best.get(rule.basis, (float('-inf'),))[0]:
+                    best[rule.basis] = (rule.threshold, rule.flat + rule.rate * value)
+        return sum(cost for _, cost in best.values())
+
+    def calculate_cost(self, order_amount: float) -> float:
+        return self.quote(order_amount)
+
+
+def _write_tariff(path: str, rules: Sequence[TariffRule]) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(TariffRule._fields)
+        writer.writerows(rules)
+    os.replace(tmp_path, path)
+
+
+def _random_tariff(count: int, zones: int, seed: int = 0) -> list[TariffRule]:
+    rng = random.Random(seed)
+    return [
+        TariffRule(
+            f'zone-{rng.randrange(zones)}',
+            rng.choice(TARIFF_BASES),
+            round(rng.uniform(0, 1000), 2),
+            round(rng.uniform(0, 20), 2),
+            round(rng.uniform(0, 0.2), 4),
+        )
+        for _ in range(count)
+    ]
+
+
+def benchmark_tariff(rule_count: int = 10_000, zones: int = 10, lookups: int = 2_000) -> None:
+    rules = _random_tariff(rule_count, zones)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'tariff.csv')
+        _write_tariff(path, rules)
+        start = time.perf_counter()
+        tariff = TariffStrategy(path)
+        load_time = time.perf_counter() - start
+        branching = _BranchingTariffStrategy(load_tariff_rules(path))
+
+        rng = random.Random(1)
+        orders = [(rng.uniform(0, 1000), rng.uniform(0, 1000), f'zone-{rng.randrange(zones)}') for _ in range(lookups)]
+        timings, costs = {}, {}
+        for strategy in (branching, tariff):
+            start = time.perf_counter()
+            costs[strategy] = [strategy.quote(amount, weight, zone) for amount, weight, zone in orders]
+            timings[strategy] = (time.perf_counter() - start) / lookups
+        assert costs[branching] == costs[tariff]
+
+        stop = threading.Event()
+        quoted = [0]
+
+        def quote_loop():
+            while not stop.is_set():
+                tariff.quote(*orders[quoted[0] % lookups])
+                quoted[0] += 1
+
+        worker = threading.Thread(target=quote_loop)
+        worker.start()
+        _write_tariff(path, _random_tariff(rule_count, zones, seed=2))
+        start = time.perf_counter()
+        tariff.reload()
+        reload_time = time.perf_counter() - start
+        stop.set()
+        worker.join()
+
+    print(f'{rule_count:,} rules over {zones} zones, compiled in {load_time * 1000:.1f} ms')
+    print(f'branching chain  {timings[branching] * 1e6:9.1f} us/quote')
+    print(
+        f'compiled tariff  {timings[tariff] * 1e6:9.1f} us/quote   '
+        f'x{timings[branching] / timings[tariff]:.0f}'
+    )
+    print(f'hot reload took {reload_time * 1000:.1f} ms; {quoted[0]:,} quotes ran meanwhile without blocking')
+
 
 if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        benchmark_batch_costs()
+        benchmark_tariff()
+        sys.exit()
+
     pickup = PickupStrategy()
     external_delivery = ExternalDeliveryStrategy()
     own_delivery = OwnDeliveryStrategy()
@@ -54,3 +343,23 @@ if __name__ == '__main__':
 
     context.set_strategy(own_delivery)
     print('Own Delivery Cost:', context.calculate_delivery_cost(100.0))
+    print('Own Delivery Costs:', list(context.calculate_costs([50.0, 100.0, 250.0])))
+
+    with tempfile.TemporaryDirectory() as tariff_dir:
+        tariff_path = os.path.join(tariff_dir, 'tariff.csv')
+        _write_tariff(tariff_path, [
+            TariffRule('default', 'amount', 0, 9.99, 0.0),
+            TariffRule('default', 'amount', 50, 4.99, 0.0),
+            TariffRule('default', 'amount', 100, 0.0, 0.0),
+            TariffRule('default', 'weight', 20, 5.0, 0.5),
+            TariffRule('remote', 'amount', 0, 19.99, 0.05),
+        ])
+        tariff = TariffStrategy(tariff_path)
+        context.set_strategy(tariff)
+        print('Tariff Cost:', context.calculate_delivery_cost(100.0))
+        print('Tariff Cost for 30 kg:', tariff.quote(100.0, weight=30.0))
+        print('Tariff Cost for remote zone:', tariff.quote(100.0, zone='remote'))
+
+        _write_tariff(tariff_path, [TariffRule('default', 'amount', 0, 2.5, 0.0)])
+        tariff.reload()
+        print('Tariff Cost after reload:', context.calculate_delivery_cost(100.0))
@@ -1,23 +1,362 @@
+import random
+import sys
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Hashable, Iterable, Optional
+
+Response = tuple[int, str, Optional[dict[str, any]]]
+
+
+# Shared read-through cache for entities
+class EntityCache:
+    """Thread-safe LRU cache of entities with a TTL, shared between updaters.
+
+    Cached dicts are shared by every reader, so treat them as read-only.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 10_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[dict[str, any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, entity: dict[str, any]) -> None:
+        with self._lock:
+            self._entries[key] = entity, time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+            }
+
+
+class VersionConflict(Exception):
+    """Raised by save_changes when the stored version no longer matches."""
 
 
 # Base abstract class with the template method
 class BaseEntityUpdater(ABC):
+    save_batch_size = 1000
+    version_field = 'version'
+    max_conflict_retries = 3
+    # True when save_changes/save_changes_many compare-and-set on version_field
+    versioned_saves = False
+
+    def __init__(self, cache: Optional[EntityCache] = None):
+        self.cache = cache
+        self._request = threading.local()
+        self._counter_lock = threading.Lock()
+        self.store_reads = 0
+        self.reads_avoided = 0
+        self.writes_skipped = 0
+        self.fields_written = 0
+        self.conflicts = 0
+
     def update(
         self, entity_id: int, new_data: dict[str, any]
     ) -> tuple[int, str, Optional[dict[str, any]]]:
-        """Template method defining the steps for updating an entity."""
-        original_data = self.get_entity(entity_id)
-        if not self.validate(original_data, new_data):
-            self.on_validation_failure(entity_id, original_data, new_data)
-            return 400, 'Validation Failed', None
+        """Template method defining the steps for updating an entity.
+
+        Only fields that differ from the stored entity are saved, and nothing
+        is written when none do. A VersionConflict from save_changes
+        re-reads the entity and retries; once retries run out it returns 409.
+        Unless the save compares versions, the diff is taken against a store
+        read rather than the shared cache, which may be stale.
+        """
+        with self.request_context():
+            for _ in range(self.max_conflict_retries + 1):
+                original_data = self.load_entity(entity_id)
+                if original_data is not None and not self._compares_versions(
+                    original_data
+                ):
+                    original_data = self.load_entity(entity_id, fresh=True)
+                if original_data is None:
+                    return 404, 'Not Found', None
+                if not self.validate(original_data, new_data):
+                    self.on_validation_failure(entity_id, original_data, new_data)
+                    return 400, 'Validation Failed', None
 
-        save_status = self.save_entity(entity_id, new_data)
-        response = self.generate_response(entity_id, save_status)
+                changes = self.changed_fields(original_data, new_data)
+                if not changes:
+                    self._count('writes_skipped')
+                    save_status = True
+                    break
+                try:
+                    save_status = self.save_changes(
+                        entity_id, changes, original_data.get(self.version_field)
+                    )
+                except VersionConflict:
+                    self._count('conflicts')
+                    self._forget(entity_id)
+                    continue
+                self._after_save(entity_id, changes, save_status)
+                break
+            else:
+                return 409, 'Conflict', None
+            response = self.generate_response(entity_id, save_status)
 
         return response
 
+    def update_many(
+        self, items: Iterable[tuple[int, dict[str, any]]]
+    ) -> list[Response]:
+        """Template method for bulk updates: one batched read, then batched saves.
+
+        Returns one (status, message, payload) tuple per item, in order.
+        Items that hit a version conflict are retried one by one via update.
+        """
+        with self.request_context():
+            return self._update_many(list(items))
+
+    def _update_many(self, items: list[tuple[int, dict[str, any]]]) -> list[Response]:
+        entity_ids = list(dict.fromkeys(entity_id for entity_id, _ in items))
+        originals = self.load_entities(entity_ids)
+        unversioned = [
+            entity_id for entity_id, entity in originals.items()
+            if not self._compares_versions(entity)
+        ]
+        if unversioned:
+            originals.update(self.load_entities(unversioned, fresh=True))
+        responses: list[Optional[Response]] = [None] * len(items)
+        checked = []
+        # Later updates of an id must see the earlier ones, so they go through
+        # update once the batch is saved
+        repeats = []
+        seen = set()
+        for index, (entity_id, new_data) in enumerate(items):
+            if entity_id in seen:
+                repeats.append((index, entity_id, new_data))
+                continue
+            seen.add(entity_id)
+            if originals.get(entity_id) is None:
+                responses[index] = 404, 'Not Found', None
+            else:
+                checked.append((index, entity_id, new_data))
+
+        valid = self.validate_many(
+            [(originals[entity_id], new_data) for _, entity_id, new_data in checked]
+        )
+        to_save = []
+        for (index, entity_id, new_data), is_valid in zip(checked, valid):
+            original_data = originals[entity_id]
+            if not is_valid:
+                self.on_validation_failure(entity_id, original_data, new_data)
+                responses[index] = 400, 'Validation Failed', None
+                continue
+            changes = self.changed_fields(original_data, new_data)
+            if changes:
+                to_save.append((index, entity_id, changes, new_data))
+            else:
+                self._count('writes_skipped')
+                responses[index] = self.generate_response(entity_id, True)
+
+        for start in range(0, len(to_save), self.save_batch_size):
+            batch = to_save[start : start + self.save_batch_size]
+            statuses = self.save_changes_many(
+                [
+                    (entity_id, changes, originals[entity_id].get(self.version_field))
+                    for _, entity_id, changes, _ in batch
+                ]
+            )
+            for (index, entity_id, changes, new_data), save_status in zip(
+                batch, statuses
+            ):
+                if save_status is None:
+                    self._count('conflicts')
+                    self._forget(entity_id)
+                    responses[index] = self.update(entity_id, new_data)
+                    continue
+                self._after_save(entity_id, changes, save_status)
+                responses[index] = self.generate_response(entity_id, save_status)
+
+        for index, entity_id, new_data in repeats:
+            responses[index] = self.update(entity_id, new_data)
+        return responses
+
+    def changed_fields(
+        self, original_data: dict[str, any], new_data: dict[str, any]
+    ) -> dict[str, any]:
+        """The subset of new_data that differs from original_data."""
+        missing = object()
+        return {
+            field: value
+            for field, value in new_data.items()
+            if original_data.get(field, missing) != value
+        }
+
+    def save_changes(
+        self, entity_id: int, changes: dict[str, any], expected_version: Optional[int]
+    ) -> bool:
+        """Save changed fields if the stored version still equals expected_version.
+
+        Raise VersionConflict otherwise; stores are expected to increment
+        the version on every write. The default ignores versions and
+        delegates to save_entity.
+        """
+        return self.save_entity(entity_id, changes)
+
+    def save_changes_many(
+        self, items: list[tuple[int, dict[str, any], Optional[int]]]
+    ) -> list[Optional[bool]]:
+        """Batched save_changes; a None status marks a version conflict.
+
+        The default ignores versions and delegates to save_entities.
+        """
+        return self.save_entities([(entity_id, data) for entity_id, data, _ in items])
+
+    @contextmanager
+    def request_context(self):
+        """Scope in which each entity is read from the store at most once.
+
+        Nested scopes share the outermost one; entities read from the store
+        inside are dropped when it exits.
+        """
+        if getattr(self._request, 'entities', None) is not None:
+            yield
+            return
+        self._request.entities = {}
+        try:
+            yield
+        finally:
+            self._request.entities = None
+
+    def cache_key(self, entity_id: int) -> Hashable:
+        return type(self).__name__, entity_id
+
+    def load_entity(
+        self, entity_id: int, fresh: bool = False
+    ) -> Optional[dict[str, any]]:
+        """get_entity through the request context and the shared cache."""
+        return self.load_entities([entity_id], fresh).get(entity_id)
+
+    def load_entities(
+        self, entity_ids: list[int], fresh: bool = False
+    ) -> dict[int, dict[str, any]]:
+        """get_entities through the request context and the shared cache.
+
+        The request context only holds entities read from the store in this
+        request; fresh=True skips the shared cache so nothing older is used.
+        """
+        context = getattr(self._request, 'entities', None)
+        found = {}
+        missing = []
+        for entity_id in entity_ids:
+            entity = context.get(entity_id) if context is not None else None
+            if entity is None and self.cache is not None and not fresh:
+                entity = self.cache.get(self.cache_key(entity_id))
+            if entity is None:
+                missing.append(entity_id)
+            else:
+                found[entity_id] = entity
+
+        if missing:
+            if len(missing) == 1:
+                fetched = {missing[0]: self.get_entity(missing[0])}
+            else:
+                fetched = self.get_entities(missing)
+            for entity_id, entity in fetched.items():
+                if entity is not None:
+                    found[entity_id] = entity
+                    if context is not None:
+                        context[entity_id] = entity
+                    if self.cache is not None:
+                        self.cache.set(self.cache_key(entity_id), entity)
+        with self._counter_lock:
+            self.store_reads += len(missing)
+            self.reads_avoided += len(entity_ids) - len(missing)
+        return found
+
+    def _after_save(
+        self, entity_id: int, changes: dict[str, any], save_status: bool
+    ) -> None:
+        if save_status:
+            self._count('fields_written', len(changes))
+        if self.cache is not None:
+            self.cache.invalidate(self.cache_key(entity_id))
+        context = getattr(self._request, 'entities', None)
+        if context is not None and entity_id in context:
+            if save_status:
+                entity = {**context[entity_id], **changes}
+                if entity.get(self.version_field) is not None:
+                    entity[self.version_field] += 1
+                context[entity_id] = entity
+            else:
+                del context[entity_id]
+
+    def _compares_versions(self, entity: dict[str, any]) -> bool:
+        """Whether saving over entity would detect a write made since it was read."""
+        return self.versioned_saves and entity.get(self.version_field) is not None
+
+    def _forget(self, entity_id: int) -> None:
+        """Drop entity_id from the request context and the cache so it is re-read."""
+        if self.cache is not None:
+            self.cache.invalidate(self.cache_key(entity_id))
+        context = getattr(self._request, 'entities', None)
+        if context is not None:
+            context.pop(entity_id, None)
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def stats(self) -> dict[str, int]:
+        with self._counter_lock:
+            return {
+                'store_reads': self.store_reads,
+                'reads_avoided': self.reads_avoided,
+                'writes_skipped': self.writes_skipped,
+                'fields_written': self.fields_written,
+                'conflicts': self.conflicts,
+            }
+
+    def get_entities(self, entity_ids: list[int]) -> dict[int, dict[str, any]]:
+        """Retrieve several entities at once; override with a single batched query."""
+        return {entity_id: self.get_entity(entity_id) for entity_id in entity_ids}
+
+    def validate_many(
+        self, pairs: list[tuple[dict[str, any], dict[str, any]]]
+    ) -> list[bool]:
+        """Validate (original_data, new_data) pairs; defaults to validate per pair."""
+        return [self.validate(original, new_data) for original, new_data in pairs]
+
+    def save_entities(self, items: list[tuple[int, dict[str, any]]]) -> list[bool]:
+        """Save (entity_id, new_data) pairs; override with a single batched write."""
+        return [self.save_entity(entity_id, new_data) for entity_id, new_data in items]
+
     @abstractmethod
     def get_entity(self, entity_id: int) -> dict[str, any]:
         """Retrieve the entity from the database or API."""
@@ -105,11 +444,194 @@ class OrderUpdater(BaseEntityUpdater):
     def generate_response(
         self, entity_id: int, save_status: bool
     ) -> tuple[int, str, Optional[dict[str, any]]]:
-        order_data = self.get_entity(entity_id)
+        order_data = self.load_entity(entity_id)
         return 200, 'Order Updated', order_data
 
 
+# In-memory store that counts round trips, and an updater backed by it
+class InMemoryEntityStore:
+    """Dict-backed store where every call is one simulated round trip."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.rows: dict[int, dict[str, any]] = {}
+        self.round_trips = 0
+        self.fields_written = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self) -> None:
+        with self._lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def fetch(self, entity_ids: Iterable[int]) -> dict[int, dict[str, any]]:
+        self._round_trip()
+        return {
+            entity_id: dict(self.rows[entity_id])
+            for entity_id in entity_ids
+            if entity_id in self.rows
+        }
+
+    def write(self, items: Iterable[tuple[int, dict[str, any]]]) -> list[bool]:
+        self._round_trip()
+        statuses = []
+        for entity_id, new_data in items:
+            row = self.rows.get(entity_id)
+            if row is not None:
+                row.update(new_data)
+            statuses.append(row is not None)
+        return statuses
+
+    def write_versioned(
+        self, items: Iterable[tuple[int, dict[str, any], Optional[int]]]
+    ) -> list[Optional[bool]]:
+        """Compare-and-set writes that bump 'version'; None marks a stale version."""
+        self._round_trip()
+        statuses = []
+        with self._lock:
+            for entity_id, changes, expected_version in items:
+                row = self.rows.get(entity_id)
+                if row is None:
+                    statuses.append(False)
+                elif expected_version not in (None, row.get('version')):
+                    statuses.append(None)
+                else:
+                    row.update(changes)
+                    if row.get('version') is not None:
+                        row['version'] += 1
+                    self.fields_written += len(changes)
+                    statuses.append(True)
+        return statuses
+
+
+class StoreProductUpdater(ProductUpdater):
+    """ProductUpdater backed by an InMemoryEntityStore with batched reads/writes."""
+
+    versioned_saves = True
+
+    def __init__(
+        self, store: InMemoryEntityStore, cache: Optional[EntityCache] = None
+    ):
+        super().__init__(cache)
+        self.store = store
+
+    def get_entity(self, entity_id: int) -> dict[str, any]:
+        return self.store.fetch([entity_id]).get(entity_id)
+
+    def get_entities(self, entity_ids: list[int]) -> dict[int, dict[str, any]]:
+        return self.store.fetch(entity_ids)
+
+    def save_entity(self, entity_id: int, new_data: dict[str, any]) -> bool:
+        return self.store.write([(entity_id, new_data)])[0]
+
+    def save_entities(self, items: list[tuple[int, dict[str, any]]]) -> list[bool]:
+        return self.store.write(items)
+
+    def save_changes(
+        self, entity_id: int, changes: dict[str, any], expected_version: Optional[int]
+    ) -> bool:
+        status = self.store.write_versioned([(entity_id, changes, expected_version)])[0]
+        if status is None:
+            raise VersionConflict(f'Product {entity_id} is past v{expected_version}')
+        return status
+
+    def save_changes_many(
+        self, items: list[tuple[int, dict[str, any], Optional[int]]]
+    ) -> list[Optional[bool]]:
+        return self.store.write_versioned(items)
+
+
+def benchmark_update_many(count: int = 50_000, latency: float = 0.0001) -> None:
+    """Round trips and time for count updates, one by one vs update_many.
+
+    latency is slept once per store call to stand in for a network hop.
+    """
+    results = {}
+    for mode in ('update', 'update_many'):
+        store = InMemoryEntityStore(latency)
+        store.rows = {
+            entity_id: {'id': entity_id, 'name': f'Product {entity_id}'}
+            for entity_id in range(count)
+        }
+        updater = StoreProductUpdater(store)
+        items = [
+            (entity_id, {'name': f'Product {entity_id} v2', 'validated': True})
+            for entity_id in range(count)
+        ]
+        # Every 100th product is set back to its old name later in the batch
+        items += [
+            (entity_id, {'name': f'Product {entity_id}', 'validated': True})
+            for entity_id in range(0, count, 100)
+        ]
+        start = time.perf_counter()
+        if mode == 'update':
+            responses = [updater.update(entity_id, data) for entity_id, data in items]
+        else:
+            responses = updater.update_many(items)
+        elapsed = time.perf_counter() - start
+        results[mode] = responses, store.rows
+        print(
+            f'{mode:<12} {len(items):,} items: '
+            f'{store.round_trips:>7,} round trips, {elapsed:.2f} s'
+        )
+    assert results['update'] == results['update_many']
+
+
+def benchmark_contention(
+    workers: int = 8, updates: int = 200, products: int = 5, latency: float = 0.0005
+) -> None:
+    """Workers hammering a few hot products: conflicts, retries and write savings."""
+    store = InMemoryEntityStore(latency)
+    store.rows = {
+        entity_id: {
+            'id': entity_id,
+            'name': f'Product {entity_id}',
+            'price': 10,
+            'validated': True,
+            'version': 0,
+        }
+        for entity_id in range(products)
+    }
+    updater = StoreProductUpdater(store)
+    statuses: dict[int, int] = {}
+    lock = threading.Lock()
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        for _ in range(updates):
+            entity_id = rng.randrange(products)
+            new_data = {
+                'name': f'Product {entity_id}',
+                'price': rng.choice((10, 10, 10, 12)),
+                'validated': True,
+            }
+            status = updater.update(entity_id, new_data)[0]
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = workers * updates
+    print(f'{total:,} concurrent updates of {products} products in {elapsed:.2f} s')
+    print(f'responses by status: {dict(sorted(statuses.items()))}')
+    print(
+        f'fields written {store.fields_written:,} vs {total * 3:,} full writes; '
+        f'{updater.stats()}'
+    )
+
+
 if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        benchmark_update_many()
+        benchmark_contention()
+        sys.exit()
+
     product_updater = ProductUpdater()
     user_updater = UserUpdater()
     order_updater = OrderUpdater()
@@ -121,3 +643,32 @@ if __name__ == '__main__':
     print(
         order_updater.update(3, {'status': 'shipped'})
     )  # Order update with JSON response
+    print('Order updater reads:', order_updater.stats())  # The response reuses the read
+
+    print(
+        user_updater.update_many([(4, {'name': 'Jane'}), (5, {'email': 'x@y.com'})])
+    )  # Bulk update through the per-item fallbacks
+
+    store = InMemoryEntityStore()
+    store.rows = {7: {'id': 7, 'name': 'Lamp', 'validated': True, 'version': 1}}
+    store_updater = StoreProductUpdater(store)
+    print(
+        store_updater.update_many([(7, {'name': 'Lamp', 'validated': True}), (8, {})])
+    )  # Bulk update against a store: one read, and no write as nothing changed
+    print('Store round trips:', store.round_trips)
+
+    cache = EntityCache(ttl=30.0)
+    cached_updater = StoreProductUpdater(store, cache)
+    for name in ('Desk Lamp', 'Floor Lamp'):
+        cached_updater.update(7, {'name': name, 'validated': False})  # Rejected
+    print(cached_updater.update(7, {'name': 'Floor Lamp', 'validated': True}))
+    print(cached_updater.update(7, {'validated': False}))  # Re-read after invalidation
+    print('Cached updater reads:', cached_updater.stats(), cache.stats())
+
+    with cached_updater.request_context():
+        version = cached_updater.load_entity(7)['version']
+        store.write_versioned([(7, {'name': 'Desk Lamp'}, version)])  # Concurrent write
+        print(
+            cached_updater.update(7, {'name': 'Reading Lamp', 'validated': True})
+        )  # Conflicts on the stale read, re-reads and retries
+    print('Stored row:', store.rows[7], cached_updater.stats())
@@ -1,4 +1,15 @@
+import sys
+import time
+import tracemalloc
 from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 # Visitor Interface
@@ -12,15 +23,23 @@ class Visitor(ABC):
     @abstractmethod
     def visit_employee(self, employee: 'Employee') -> dict[str, float]: ...
 
+    # Hook for the columnar model; visitors without a columnar version walk objects
+    def visit_columns(self, columns: 'ColumnarCompany') -> dict[str, float]:
+        return self.visit_company(columns.to_company())
+
 
 # Element Interface
 class Element(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor: Visitor) -> dict[str, float]: ...
 
 
 # Employee class
 class Employee(Element):
+    __slots__ = ('name', 'position', 'salary')
+
     def __init__(self, name: str, position: str, salary: float):
         self.name = name
         self.position = position
@@ -32,6 +51,8 @@ class Employee(Element):
 
 # Department class
 class Department(Element):
+    __slots__ = ('name', 'employees')
+
     def __init__(self, name: str, employees: list[Employee]):
         self.name = name
         self.employees = employees
@@ -42,6 +63,8 @@ class Department(Element):
 
 # Company class
 class Company(Element):
+    __slots__ = ('name', 'departments')
+
     def __init__(self, name: str, departments: list[Department]):
         self.name = name
         self.departments = departments
@@ -50,6 +73,82 @@ class Company(Element):
         return visitor.visit_company(self)
 
 
+# Columnar Company: one row per employee in flat arrays instead of objects
+class ColumnarCompany(Element):
+    __slots__ = (
+        'name',
+        'department_names',
+        'employee_names',
+        'positions',
+        'department_index',
+        'salaries',
+    )
+
+    def __init__(self, name: str, department_names: Sequence[str] = ()):
+        self.name = name
+        self.department_names = list(department_names)
+        self.employee_names: list[str] = []
+        self.positions: list[str] = []
+        self.department_index = array('i')
+        self.salaries = array('d')
+
+    @classmethod
+    def from_company(cls, company: Company) -> 'ColumnarCompany':
+        columns = cls(company.name, [dept.name for dept in company.departments])
+        for index, department in enumerate(company.departments):
+            columns.extend(index, department.employees)
+        return columns
+
+    def add_employee(
+        self, department: int, name: str, position: str, salary: float
+    ) -> None:
+        self.department_index.append(department)
+        self.employee_names.append(name)
+        self.positions.append(position)
+        self.salaries.append(salary)
+
+    def extend(self, department: int, employees: Iterable[Employee]) -> None:
+        for employee in employees:
+            self.add_employee(
+                department, employee.name, employee.position, employee.salary
+            )
+
+    def to_company(self) -> Company:
+        departments = [Department(name, []) for name in self.department_names]
+        for department, name, position, salary in zip(
+            self.department_index, self.employee_names, self.positions, self.salaries
+        ):
+            departments[department].employees.append(Employee(name, position, salary))
+        return Company(self.name, departments)
+
+    def accept(self, visitor: Visitor) -> dict[str, float]:
+        return visitor.visit_columns(self)
+
+
+def is_grouped(index: array) -> bool:
+    return all(map(int.__le__, index, index[1:]))
+
+
+def group_bounds(index: array, groups: int) -> list[int]:
+    # Row offsets of each group in an index that is_grouped
+    return [bisect_left(index, group) for group in range(groups + 1)]
+
+
+# Per-group sums: bincount with NumPy, else one C-level sum() per department
+# when rows are grouped by department, else a plain loop
+def group_sums(index: array, values: array, groups: int) -> list[float]:
+    if np is not None:
+        index = np.frombuffer(index, dtype=np.intc)
+        return np.bincount(index, np.frombuffer(values), minlength=groups).tolist()
+    if is_grouped(index):
+        bounds = group_bounds(index, groups)
+        return [sum(values[start:end]) for start, end in zip(bounds, bounds[1:])]
+    totals = [0.0] * groups
+    for group, value in zip(index, values):
+        totals[group] += value
+    return totals
+
+
 # Concrete Visitor class to generate the Salary Statement Report
 class SalaryReportVisitor(Visitor):
     def visit_company(self, company: Company) -> dict[str, float]:
@@ -57,7 +156,8 @@ class SalaryReportVisitor(Visitor):
         total_salary = 0
         for department in company.departments:
             dept_report = department.accept(self)
-            total_salary += sum(dept_report.values())
+            dept_total = f'Total Salary for Department {department.name}'
+            total_salary += dept_report[dept_total]
             report.update(dept_report)
         report['Total Company Salary'] = total_salary
         return report
@@ -76,7 +176,112 @@ class SalaryReportVisitor(Visitor):
         return {employee.name: employee.salary}
 
 
+# Columnar Visitor: the same report from group-by sums over ColumnarCompany
+class ColumnarSalaryReportVisitor(Visitor):
+    def __init__(self, include_employees: bool = True):
+        self.include_employees = include_employees
+
+    def visit_columns(self, columns: ColumnarCompany) -> dict[str, float]:
+        groups = len(columns.department_names)
+        totals = group_sums(columns.department_index, columns.salaries, groups)
+        report = {}
+        if self.include_employees:
+            # Employee rows are listed department by department, as in the object walk
+            if not is_grouped(columns.department_index):
+                columns = ColumnarCompany.from_company(columns.to_company())
+            bounds = group_bounds(columns.department_index, groups)
+            for department, name in enumerate(columns.department_names):
+                rows = slice(bounds[department], bounds[department + 1])
+                report.update(zip(columns.employee_names[rows], columns.salaries[rows]))
+                report[f'Total Salary for Department {name}'] = totals[department]
+        else:
+            for name, total in zip(columns.department_names, totals):
+                report[f'Total Salary for Department {name}'] = total
+        report['Total Company Salary'] = sum(totals)
+        return report
+
+    def visit_company(self, company: Company) -> dict[str, float]:
+        return self.visit_columns(ColumnarCompany.from_company(company))
+
+    def visit_department(self, department: Department) -> dict[str, float]:
+        columns = ColumnarCompany.from_company(Company('', [department]))
+        report = self.visit_columns(columns)
+        del report['Total Company Salary']
+        return report
+
+    def visit_employee(self, employee: Employee) -> dict[str, float]:
+        return {employee.name: employee.salary}
+
+
+# Benchmark: object walk vs columnar group-by on a large org
+def _measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    built = build()
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, elapsed, memory
+
+
+def benchmark_salary_report(employees: int = 2_000_000, departments: int = 200):
+    per_department = employees // departments
+    rows = per_department * departments
+    department_names = [f'D{dept}' for dept in range(departments)]
+
+    def build_objects() -> Company:
+        return Company(
+            'BigCorp',
+            [
+                Department(
+                    name,
+                    [
+                        Employee(f'E{dept}-{row}', 'Engineer', 50000 + row % 1000)
+                        for row in range(per_department)
+                    ],
+                )
+                for dept, name in enumerate(department_names)
+            ],
+        )
+
+    def build_columns() -> ColumnarCompany:
+        columns = ColumnarCompany('BigCorp', department_names)
+        for dept in range(departments):
+            for row in range(per_department):
+                salary = 50000 + row % 1000
+                columns.add_employee(dept, f'E{dept}-{row}', 'Engineer', salary)
+        return columns
+
+    backend = 'numpy' if np is not None else 'array'
+    print(f'{rows:,} employees in {departments} departments, backend: {backend}')
+    company, build_time, memory = _measure(build_objects)
+    print(f'objects  build {build_time:5.2f} s, {memory / rows:4.0f} B/employee')
+    columns, build_time, memory = _measure(build_columns)
+    print(f'columns  build {build_time:5.2f} s, {memory / rows:4.0f} B/employee')
+
+    cases = (
+        ('object walk', company, SalaryReportVisitor()),
+        ('columnar', columns, ColumnarSalaryReportVisitor()),
+        ('columnar totals', columns, ColumnarSalaryReportVisitor(False)),
+    )
+    reports = {}
+    baseline = None
+    for label, element, visitor in cases:
+        start = time.perf_counter()
+        reports[label] = element.accept(visitor)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f'{label:<16} report {elapsed:6.3f} s   x{baseline / elapsed:.1f}')
+    assert reports['columnar'] == reports['object walk']
+    total = reports['object walk']['Total Company Salary']
+    assert reports['columnar totals']['Total Company Salary'] == total
+
+
 if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        benchmark_salary_report()
+        sys.exit()
+
     emp1 = Employee('Alice', 'Engineer', 70000)
     emp2 = Employee('Bob', 'Manager', 80000)
     emp3 = Employee('Charlie', 'Technician', 50000)
@@ -99,3 +304,7 @@ if __name__ == '__main__':
     print('\nDepartment Salary Report (Management):')
     dept_report = dept2.accept(salary_report_visitor)
     print(dept_report)
+
+    print('\nColumnar Salary Report:')
+    columns = ColumnarCompany.from_company(company)
+    print(columns.accept(ColumnarSalaryReportVisitor(include_employees=False)))